@@ -0,0 +1,238 @@
+"""Admission control for Dash callback requests.
+
+Callbacks are split into cheap and expensive classes, each with a limit on
+the requests served at once and a bounded queue of requests waiting for a
+slot. Requests that find the queue full, or wait too long, get a fast 503
+with a Retry-After header instead of piling up behind slow ones.
+
+Background callbacks are also turned away while the worker processes have a
+full backlog of jobs.
+
+Queue depth, wait times and rejections, and the background job backlog, are
+served as JSON from `/_admission-stats`, and each callback response reports
+its queue wait in a `Server-Timing` header.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+import numpy as np
+from flask import Flask, Response, jsonify, request
+
+from covid19_dash.jobs import JobBacklogFull, ProcessPoolManager
+
+CALLBACK_URL = "/_dash-update-component"
+STATS_URL = "/_admission-stats"
+# Callback outputs that take hundreds of milliseconds or more to compute
+EXPENSIVE_OUTPUTS = {
+    "column-charts.children",
+    "line-plot.figure",
+    "totals.children",
+}
+# Requests served at once, and requests allowed to wait, for each class.
+# Waiting requests hold a server thread, so the server needs more threads
+# than all of these combined, to spare some for pages, assets and the API.
+EXPENSIVE_CONCURRENCY = int(os.environ.get("EXPENSIVE_CONCURRENCY", 2))
+EXPENSIVE_QUEUE = int(os.environ.get("EXPENSIVE_QUEUE", 4))
+CHEAP_CONCURRENCY = int(os.environ.get("CHEAP_CONCURRENCY", 4))
+CHEAP_QUEUE = int(os.environ.get("CHEAP_QUEUE", 6))
+# Seconds a request may wait for a slot before it is turned away
+MAX_WAIT = float(os.environ.get("ADMISSION_MAX_WAIT", 5))
+# Number of recent requests that wait and service times are kept for
+SAMPLES = 1000
+
+
+class Gate:
+    """Limit the requests of one class served at once, with a bounded queue
+    for the rest.
+
+    Args:
+        concurrency (int): Requests served at once.
+        queue_size (int): Requests allowed to wait for a slot.
+        max_wait (float): Seconds a request may wait for a slot.
+    """
+
+    def __init__(
+        self, concurrency: int, queue_size: int, max_wait: float
+    ) -> None:
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._condition = threading.Condition()
+        self._waits = deque(maxlen=SAMPLES)
+        self._service_times = deque(maxlen=SAMPLES)
+
+    def acquire(self) -> float | None:
+        """Wait for a slot.
+
+        Returns:
+            float | None: Seconds waited, or None if the request was turned
+                away because the queue was full or the wait too long.
+        """
+        start = time.perf_counter()
+        with self._condition:
+            if self.active >= self.concurrency:
+                if self.queued >= self.queue_size:
+                    self.rejected += 1
+                    return None
+                self.queued += 1
+                try:
+                    has_slot = self._condition.wait_for(
+                        lambda: self.active < self.concurrency,
+                        timeout=self.max_wait,
+                    )
+                finally:
+                    self.queued -= 1
+                if not has_slot:
+                    self.rejected += 1
+                    return None
+            self.active += 1
+            self.admitted += 1
+            wait = time.perf_counter() - start
+            self._waits.append(wait)
+            return wait
+
+    def release(self, service_time: float) -> None:
+        """Free a slot for the next waiting request.
+
+        Args:
+            service_time (float): Seconds the finished request took.
+        """
+        with self._condition:
+            self.active -= 1
+            self._service_times.append(service_time)
+            self._condition.notify()
+
+    def retry_after(self) -> int:
+        """Estimate the seconds until the queue has room again.
+
+        Returns:
+            int: Seconds, at least 1.
+        """
+        with self._condition:
+            service_time = np.mean(self._service_times or [1.0])
+            backlog = self.active + self.queued
+        return max(1, math.ceil(backlog * service_time / self.concurrency))
+
+    def stats(self) -> dict:
+        """Get the gate's limits, current queue depth and recent waits.
+
+        Returns:
+            dict: Statistics, with wait times in milliseconds.
+        """
+        with self._condition:
+            waits = np.array(self._waits) * 1e3
+            stats = {
+                "concurrency": self.concurrency,
+                "queue_size": self.queue_size,
+                "active": self.active,
+                "queue_depth": self.queued,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
+        for name, value in [
+            ("p50", np.percentile(waits, 50) if waits.size else 0),
+            ("p95", np.percentile(waits, 95) if waits.size else 0),
+            ("max", waits.max() if waits.size else 0),
+        ]:
+            stats[f"wait_{name}_ms"] = round(float(value), 1)
+        return stats
+
+
+def callback_class() -> str:
+    """Classify the current callback request as "cheap" or "expensive".
+
+    Polls for background callback results are always cheap, since the work
+    is done by worker processes.
+
+    Returns:
+        str: The request's class.
+    """
+    if "cacheKey" in request.args:
+        return "cheap"
+    output = (request.get_json(silent=True) or {}).get("output")
+    return "expensive" if output in EXPENSIVE_OUTPUTS else "cheap"
+
+
+def busy_response(retry_after: int) -> Response:
+    """Reply that the server is busy.
+
+    Args:
+        retry_after (int): Seconds the client should wait before retrying.
+
+    Returns:
+        flask.Response: A 503 response with a Retry-After header.
+    """
+    response = jsonify({"error": "The server is busy, try again."})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def init_admission_control(
+    server: Flask,
+    gates: dict[str, Gate] | None = None,
+    jobs: ProcessPoolManager | None = None,
+) -> dict[str, Gate]:
+    """Put Dash callback requests on `server` behind admission control, and
+    serve statistics from `STATS_URL`.
+
+    Args:
+        server (flask.Flask): The Dash app's server.
+        gates (dict[str, Gate] | None, optional): Gates for "cheap" and
+            "expensive" callbacks. Defaults to None, i.e. gates with the
+            configured limits.
+        jobs (ProcessPoolManager | None, optional): The app's background
+            callback manager, whose backlog is reported. Defaults to None.
+
+    Returns:
+        dict[str, Gate]: The gates, by callback class.
+    """
+    if gates is None:
+        gates = {
+            "cheap": Gate(CHEAP_CONCURRENCY, CHEAP_QUEUE, MAX_WAIT),
+            "expensive": Gate(
+                EXPENSIVE_CONCURRENCY, EXPENSIVE_QUEUE, MAX_WAIT
+            ),
+        }
+    endpoint = next(
+        rule.endpoint
+        for rule in server.url_map.iter_rules()
+        if rule.rule.endswith(CALLBACK_URL)
+    )
+    view = server.view_functions[endpoint]
+
+    @wraps(view)
+    def admitted_view(*args, **kwargs):
+        gate = gates[callback_class()]
+        wait = gate.acquire()
+        if wait is None:
+            return busy_response(gate.retry_after())
+
+        start = time.perf_counter()
+        try:
+            response = server.make_response(view(*args, **kwargs))
+        except JobBacklogFull as error:
+            return busy_response(error.retry_after)
+        finally:
+            gate.release(time.perf_counter() - start)
+        response.headers.add("Server-Timing", f"queue;dur={wait * 1e3:.1f}")
+        return response
+
+    def admission_stats() -> Response:
+        stats = {name: gate.stats() for name, gate in gates.items()}
+        if jobs is not None:
+            stats["background"] = jobs.stats()
+        return jsonify(stats)
+
+    server.view_functions[endpoint] = admitted_view
+    server.add_url_rule(STATS_URL, "admission_stats", admission_stats)
+    return gates
@@ -0,0 +1,163 @@
+"""Read-only JSON API for the dashboard's data.
+
+Responses are columnar, i.e. one list of values per column:
+
+    {"version": "...", "rows": 2, "columns": {"Iso Code": [...], ...}}
+
+Every response carries an ETag derived from the data version and the
+request, so unchanged data can be revalidated with `If-None-Match`.
+
+Endpoints:
+    GET /api/v1/time-series?countries=KEN,UGA&columns=Confirmed&start=&end=
+    GET /api/v1/latest?countries=KEN,UGA&columns=Total Cases,New Cases
+    GET /api/v1/daily-differences?columns=Confirmed
+"""
+
+import hashlib
+import json
+from datetime import date
+
+import numpy as np
+from flask import Blueprint, Response, jsonify, request
+from werkzeug.exceptions import BadRequest
+
+from covid19_dash.countries import load_country_registry
+from covid19_dash.indexes import (
+    ColumnTable,
+    load_30_day_diff_table,
+    load_latest_day_table,
+    load_time_series_index,
+    load_time_series_table,
+)
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+@api.errorhandler(BadRequest)
+def bad_request(error: BadRequest) -> tuple[Response, int]:
+    return jsonify({"error": error.description}), 400
+
+
+@api.get("/time-series")
+def time_series() -> Response:
+    """Confirmed cases and deaths over time, per country."""
+    table = load_time_series_table()
+    columns = _columns_arg(table)
+    country_ids = _countries_arg()
+    start, end = _date_arg("start"), _date_arg("end")
+    if (response := _not_modified(table)) is not None:
+        return response
+
+    if country_ids is None:
+        country_ids = range(len(load_country_registry()))
+    positions = load_time_series_index().positions(country_ids, start, end)
+    return _columnar_response(table, columns, positions)
+
+
+@api.get("/latest")
+def latest() -> Response:
+    """The latest day's metrics, per country."""
+    table = load_latest_day_table()
+    columns = _columns_arg(table)
+    country_ids = _countries_arg()
+    if (response := _not_modified(table)) is not None:
+        return response
+
+    # Rows are in country id order
+    positions = (
+        None if country_ids is None else np.asarray(country_ids, dtype=int)
+    )
+    return _columnar_response(table, columns, positions)
+
+
+@api.get("/daily-differences")
+def daily_differences() -> Response:
+    """Global daily changes in confirmed cases and deaths, for the last 30
+    days."""
+    table = load_30_day_diff_table()
+    columns = _columns_arg(table)
+    if (response := _not_modified(table)) is not None:
+        return response
+
+    return _columnar_response(table, columns)
+
+
+def _list_arg(name: str) -> list[str] | None:
+    """Get a comma-separated query parameter as a list, or None if it lists
+    nothing, e.g. `?countries=,,`."""
+    value = request.args.get(name, "")
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    return items or None
+
+
+def _columns_arg(table: ColumnTable) -> list[str]:
+    """Get the requested columns, defaulting to all of them."""
+    columns = _list_arg("columns")
+    if columns is None:
+        return list(table.columns)
+    unknown = [name for name in columns if name not in table.columns]
+    if unknown:
+        raise BadRequest(f"Unknown columns: {', '.join(unknown)}")
+    return columns
+
+
+def _countries_arg() -> list[int] | None:
+    """Get the ids of the requested ISO-3 country codes, or None for all
+    countries."""
+    iso_codes = _list_arg("countries")
+    if iso_codes is None:
+        return None
+    iso_codes = [code.upper() for code in iso_codes]
+    country_ids = load_country_registry().ids(iso_codes)
+    unknown = [code for code, id in zip(iso_codes, country_ids) if id < 0]
+    if unknown:
+        raise BadRequest(f"Unknown countries: {', '.join(unknown)}")
+    return country_ids.tolist()
+
+
+def _date_arg(name: str) -> date | None:
+    """Get an ISO 8601 date query parameter."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"Invalid {name} date: {value}")
+
+
+def _etag(table: ColumnTable) -> str:
+    """Get the ETag of a response, from the data version and the request."""
+    digest = hashlib.sha256(request.full_path.encode()).hexdigest()
+    return f"{table.version}-{digest[:12]}"
+
+
+def _not_modified(table: ColumnTable) -> Response | None:
+    """Get a 304 response if the client already has the current data."""
+    etag = _etag(table)
+    if not request.if_none_match.contains(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def _columnar_response(
+    table: ColumnTable,
+    columns: list[str],
+    positions: np.ndarray | None = None,
+) -> Response:
+    """Serialize the selected rows and columns of `table`."""
+    values = table.project(columns, positions)
+    body = {
+        "version": table.version,
+        "rows": table.n_rows if positions is None else len(positions),
+        "columns": values,
+    }
+    response = Response(
+        json.dumps(body, separators=(",", ":")), mimetype="application/json"
+    )
+    response.set_etag(_etag(table))
+    # The data changes at most daily: let clients cache, but revalidate
+    response.headers["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,93 @@
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from covid19_dash.data import TODAY, load_latest_day_data, single_flight
+
+
+class CountryRegistry:
+    """Countries keyed by ISO-3 code, each with a compact integer id.
+
+    Ids are positions in the sorted array of ISO-3 codes, so they can be used
+    directly to index numpy arrays built over the same registry.
+
+    Args:
+        iso_codes (Iterable[str]): ISO-3 country codes.
+        names (Iterable[str]): Display names, in the same order as
+            `iso_codes`.
+    """
+
+    def __init__(self, iso_codes: Iterable[str], names: Iterable[str]) -> None:
+        countries = pd.Series(list(names), index=list(iso_codes)).sort_index()
+        self.iso_codes = countries.index
+        self.names = countries.to_numpy()
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> "CountryRegistry":
+        """Create a registry from a frame with "Iso Code" and "Location"
+        columns.
+
+        Args:
+            data (pandas.DataFrame): Latest-day data.
+
+        Returns:
+            CountryRegistry: The country registry.
+        """
+        countries = data[["Iso Code", "Location"]].drop_duplicates("Iso Code")
+        return cls(countries["Iso Code"], countries["Location"])
+
+    def __len__(self) -> int:
+        return len(self.iso_codes)
+
+    def ids(self, iso_codes: Iterable[str]) -> np.ndarray:
+        """Get the integer ids of the given ISO-3 codes.
+
+        Args:
+            iso_codes (Iterable[str]): ISO-3 country codes.
+
+        Returns:
+            numpy.ndarray: Country ids, with -1 for unknown codes.
+        """
+        return self.iso_codes.get_indexer(iso_codes)
+
+    def options(self, country_ids: Iterable[int]) -> list[dict]:
+        """Get dropdown options for the given countries, sorted by name.
+
+        Values are ISO-3 codes rather than ids, since ids change when
+        countries are added to or removed from the data, and browsers keep
+        selected values between visits.
+
+        Args:
+            country_ids (Iterable[int]): Country ids. Unknown (negative) ids
+                are left out.
+
+        Returns:
+            list[dict]: Options with the country name as label and the
+                ISO-3 code as value.
+        """
+        return sorted(
+            (
+                {
+                    "label": self.names[country_id],
+                    "value": self.iso_codes[country_id],
+                }
+                for country_id in country_ids
+                if country_id >= 0
+            ),
+            key=lambda option: option["label"],
+        )
+
+
+@single_flight(maxsize=2)
+def load_country_registry(date: date = TODAY) -> CountryRegistry:
+    """Get the country registry for the latest day's data.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        CountryRegistry: Countries in the latest day's data.
+    """
+    return CountryRegistry.from_frame(load_latest_day_data(date))
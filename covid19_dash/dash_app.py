@@ -1,11 +1,29 @@
 import dash
 
-app = dash.Dash(
+from covid19_dash.admission import init_admission_control
+from covid19_dash.api import api
+from covid19_dash.jobs import background_callback_manager
+from covid19_dash.profiling import init_profiling
+from covid19_dash.static import init_static_assets, stylesheet_links
+
+
+class Dash(dash.Dash):
+    """A Dash app that links stylesheets by content hash, rather than through
+    Dash's assets route."""
+
+    def interpolate_index(self, **kwargs) -> str:
+        kwargs["css"] = f"{kwargs['css']}\n{stylesheet_links()}"
+        return super().interpolate_index(**kwargs)
+
+
+app = Dash(
     "covid19_dash",
     title="COVID-19 Dashboard",
-    external_scripts=[
-        "https://cdn.plot.ly/plotly-2.16.1.min.js",
-    ],
+    # Stylesheets are linked by content hash instead, and plotly.js is loaded
+    # by dcc.Graph from its own bundle, only on pages with graphs.
+    assets_ignore=r"\.css$",
+    # Slow callbacks run in worker processes, off the request threads
+    background_callback_manager=background_callback_manager,
     meta_tags=[
         {
             "name": "viewport",
@@ -15,3 +33,12 @@ app = dash.Dash(
     suppress_callback_exceptions=True,
     use_pages=True,
 )
+init_static_assets(app.server)
+app.server.register_blueprint(api)
+init_profiling(app.server)
+init_admission_control(app.server, jobs=background_callback_manager)
+# Dash copies page callbacks into the app on its first request. Do it now, so
+# that simultaneous first requests cannot reach a callback before it is there.
+app._setup_server()
+# Fork the background callback workers before any request threads exist
+background_callback_manager.start()
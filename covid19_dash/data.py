@@ -1,6 +1,12 @@
+import inspect
+import os
+import threading
+from collections import Counter, OrderedDict
 from datetime import date
-from functools import lru_cache
+from functools import wraps
+from itertools import chain
 from pathlib import Path
+from typing import Callable, Iterable, NamedTuple
 
 import pandas as pd
 
@@ -19,6 +25,59 @@ PROCESSED_DATA_URL = (
     "main/covid-19-data"
 )
 TODAY = date.today()
+# Loaders wrapped with `single_flight`, by name
+LOADERS = {}
+# Metrics that can be explored on the global dashboard
+GLOBAL_METRICS = [
+    "New Cases",
+    "Total Cases Per Million",
+    "Total Cases",
+    "Total Deaths",
+    "People Fully Vaccinated Per Hundred",
+    "People Fully Vaccinated",
+    "Total Vaccinations",
+    "Hospital Beds Per Thousand",
+    "Aged 70 Older",
+    "Diabetes Prevalence",
+    "Life Expectancy",
+]
+# Metrics compared across the selected countries on the compare page
+COMPARE_METRICS = [
+    "Total Cases",
+    "Total Cases Per Million",
+    "Total Deaths",
+    "Total Deaths Per Million",
+    "People Fully Vaccinated",
+    "People Fully Vaccinated Per Hundred",
+    "Hospital Beds Per Thousand",
+    "Population Density",
+]
+# Latest-day columns used by each part of the dashboard. Only these are read
+# by `load_latest_day_data`: the Raw Values page, its download and the API
+# use every column, from `load_full_latest_day_data`.
+LATEST_DAY_COLUMNS = {
+    "countries": ["Iso Code", "Continent", "Location"],
+    "plot_metrics": ["Total Cases", "People Fully Vaccinated", "Population"],
+    "plot_map": ["Last Updated Date", *GLOBAL_METRICS],
+    "show_leaderboard": GLOBAL_METRICS,
+    "plot_column_charts": COMPARE_METRICS,
+    "find_similar_countries": ["Iso Code", "Population"],
+}
+# JHU country names that differ from OWID's
+JHU_COUNTRY_NAMES = {
+    "Cabo Verde": "Cape Verde",
+    "Congo (Brazzaville)": "Congo",
+    "Congo (Kinshasa)": "Democratic Republic of Congo",
+    "Micronesia": "Micronesia (country)",
+    "Burma": "Myanmar",
+    "West Bank and Gaza": "Palestine",
+    "Korea, North": "North Korea",
+    "Korea, South": "South Korea",
+    "Taiwan*": "Taiwan",
+    "Timor-Leste": "Timor",
+    "US": "United States",
+    "Holy See": "Vatican",
+}
 
 
 def fetch_latest_data() -> None:
@@ -30,14 +89,40 @@ def fetch_latest_data() -> None:
     # Switch column names to title case
     data.columns = data.columns.str.replace("_", " ").str.title()
 
-    (
-        # Remove regional totals: 'OWID_AFR', 'OWID_ASI', 'OWID_EUR',
-        # 'OWID_EUN', 'OWID_INT', 'OWID_KOS', 'OWID_NAM', 'OWID_OCE',
-        # 'OWID_SAM', 'OWID_WRL'
-        data[~data["Iso Code"].str.startswith("OWID")]
-        # Persist local copy
-        .to_csv(DATA_DIR / "latest-data.csv", index=False)
-    )
+    # Remove regional totals: 'OWID_AFR', 'OWID_ASI', 'OWID_EUR', 'OWID_EUN',
+    # 'OWID_INT', 'OWID_KOS', 'OWID_NAM', 'OWID_OCE', 'OWID_SAM', 'OWID_WRL'
+    data = data[~data["Iso Code"].str.startswith("OWID")]
+
+    # Persist local copy, and keep it in the historical store
+    data.to_csv(DATA_DIR / "latest-data.csv", index=False)
+    append_snapshot(data)
+
+
+def append_snapshot(data: pd.DataFrame) -> None:
+    """Add the latest day's data to the store of daily snapshots.
+
+    Each snapshot is saved as a compressed CSV file named after its date, and
+    existing snapshots are never overwritten. The list of available dates is
+    kept in "snapshots/dates.csv".
+
+    Args:
+        data (pandas.DataFrame): Latest-day data.
+    """
+    snapshot_dir = DATA_DIR / "snapshots"
+    snapshot_dir.mkdir(exist_ok=True)
+    snapshot_date = pd.to_datetime(data["Last Updated Date"]).max().date()
+    snapshot_file = snapshot_dir / f"{snapshot_date}.csv.gz"
+
+    if not snapshot_file.exists():
+        data.to_csv(snapshot_file, index=False)
+    pd.DataFrame(
+        {
+            "Date": sorted(
+                path.name.removesuffix(".csv.gz")
+                for path in snapshot_dir.glob("*.csv.gz")
+            )
+        }
+    ).to_csv(snapshot_dir / "dates.csv", index=False)
 
 
 def fetch_jhu_data(category: str) -> pd.Series:
@@ -67,9 +152,72 @@ def fetch_jhu_data(category: str) -> pd.Series:
     return data
 
 
+def match_jhu_countries(
+    names: Iterable[str], locations: pd.DataFrame
+) -> pd.DataFrame:
+    """Resolve JHU country names to OWID ISO-3 codes and display names.
+
+    Args:
+        names (Iterable[str]): Unique JHU country names.
+        locations (pandas.DataFrame): OWID "Iso Code" and "Location" columns.
+
+    Returns:
+        pandas.DataFrame: "Iso Code" and "Location" for each JHU name. Both
+            are null for names without an OWID match.
+    """
+    owid_names = pd.Index(names).map(
+        lambda name: JHU_COUNTRY_NAMES.get(name, name)
+    )
+    iso_codes = owid_names.map(locations.set_index("Location")["Iso Code"])
+    return pd.DataFrame(
+        {
+            "Iso Code": iso_codes,
+            "Location": owid_names.where(iso_codes.notna()),
+        },
+        index=pd.Index(names, name="Country/Region"),
+    )
+
+
+def report_unmatched_countries(
+    matches: pd.DataFrame, locations: pd.DataFrame
+) -> None:
+    """List countries found in only one of the data sources, and save the list
+    locally.
+
+    Args:
+        matches (pandas.DataFrame): Output of `match_jhu_countries`.
+        locations (pandas.DataFrame): OWID "Iso Code" and "Location" columns.
+    """
+    unmatched = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "Source": "JHU",
+                    "Name": matches.index[matches["Iso Code"].isna()],
+                }
+            ),
+            pd.DataFrame(
+                {
+                    "Source": "OWID",
+                    "Name": locations.loc[
+                        ~locations["Iso Code"].isin(matches["Iso Code"]),
+                        "Location",
+                    ],
+                }
+            ),
+        ]
+    )
+    for source, names in unmatched.groupby("Source")["Name"]:
+        print(f"Unmatched {source} countries: {', '.join(names)}")
+    unmatched.to_csv(DATA_DIR / "unmatched-countries.csv", index=False)
+
+
 def fetch_time_series_data() -> None:
     """Gather "confirmed" and "deaths" time-series data from JHU CSSE, compute
     differences for the last 30 days; and persist both locally.
+
+    Country names are resolved to ISO-3 codes using the "latest-data.csv"
+    file in `DATA_DIR`, so `fetch_latest_data` must run first.
     """
     print("Fetching time series info...")
     case_data = pd.concat(
@@ -79,22 +227,20 @@ def fetch_time_series_data() -> None:
     # Restore "Country/Region" and "Date" index levels as columns
     case_data.reset_index(inplace=True)
 
-    # Harmonize country names accross data sources
-    case_data["Country/Region"] = case_data["Country/Region"].replace(
-        {
-            "Cabo Verde": "Cape Verde",
-            "Congo (Brazzaville)": "Congo",
-            "Congo (Kinshasa)": "Democratic Republic of Congo",
-            "Micronesia": "Micronesia (country)",
-            "Burma": "Myanmar",
-            "West Bank and Gaza": "Palestine",
-            "Korea, North": "North Korea",
-            "Korea, South": "South Korea",
-            "Taiwan*": "Taiwan",
-            "Timor-Leste": "Timor",
-            "US": "United States",
-            "Holy See": "Vatican",
-        }
+    # Resolve each JHU country name to an ISO-3 code once, and use OWID's
+    # display names so that both data sources join on the same key.
+    locations = pd.read_csv(
+        DATA_DIR / "latest-data.csv", usecols=["Iso Code", "Location"]
+    )
+    matches = match_jhu_countries(
+        case_data["Country/Region"].unique(), locations
+    )
+    report_unmatched_countries(matches, locations)
+    case_data.insert(
+        1, "Iso Code", case_data["Country/Region"].map(matches["Iso Code"])
+    )
+    case_data["Country/Region"] = case_data["Country/Region"].map(
+        matches["Location"]
     )
     case_data["Date"] = pd.to_datetime(case_data["Date"])
 
@@ -103,14 +249,153 @@ def fetch_time_series_data() -> None:
         DATA_DIR / "daily-differences.csv"
     )
     # Aggregate weekly to reduce file size. Select values at start of week.
-    case_data.groupby("Country/Region").resample(
+    # Only countries with an ISO-3 code can be joined with OWID data.
+    case_data.dropna(subset=["Iso Code"]).groupby("Country/Region").resample(
         "1W", on="Date"
     ).first().droplevel(0).to_csv(DATA_DIR / "time-series-data.csv")
 
 
-@lru_cache(maxsize=2)
+class CacheInfo(NamedTuple):
+    hits: int
+    loads: int
+    # Callers that waited for a load already in progress, instead of
+    # loading the same data again
+    waits: int
+    currsize: int
+    maxsize: int
+
+
+class _Flight:
+    """A load in progress, which other callers can wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def single_flight(maxsize: int = 2) -> Callable:
+    """Cache a loader's results, like `functools.lru_cache`, but let only one
+    caller at a time load any given key.
+
+    Concurrent callers for a key that is being loaded wait for that result
+    instead of starting their own download. Arguments are bound to the
+    loader's signature first, so `loader()` and `loader(TODAY)` share a cache
+    entry. Forked processes keep cached results, but not loads in progress.
+
+    Args:
+        maxsize (int, optional): Number of results to keep. Defaults to 2.
+
+    Returns:
+        Callable: A decorator.
+    """
+
+    def decorator(loader: Callable) -> Callable:
+        signature = inspect.signature(loader)
+        lock = threading.Lock()
+        cache = OrderedDict()
+        flights = {}
+        stats = Counter()
+
+        @wraps(loader)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (bound.args, tuple(sorted(bound.kwargs.items())))
+
+            with lock:
+                if key in cache:
+                    stats["hits"] += 1
+                    cache.move_to_end(key)
+                    return cache[key]
+                flight = flights.get(key)
+                if flight is None:  # No load in progress: this caller loads
+                    stats["loads"] += 1
+                    flight = flights[key] = _Flight()
+                    is_loader = True
+                else:
+                    stats["waits"] += 1
+                    is_loader = False
+
+            if not is_loader:
+                flight.done.wait()
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+
+            try:
+                flight.value = loader(*bound.args, **bound.kwargs)
+            except BaseException as error:
+                flight.error = error
+                raise
+            else:
+                with lock:
+                    cache[key] = flight.value
+                    if len(cache) > maxsize:
+                        cache.popitem(last=False)
+            finally:
+                with lock:
+                    del flights[key]
+                flight.done.set()
+            return flight.value
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(
+                    stats["hits"],
+                    stats["loads"],
+                    stats["waits"],
+                    len(cache),
+                    maxsize,
+                )
+
+        def cache_clear() -> None:
+            with lock:
+                cache.clear()
+                stats.clear()
+
+        def reset_after_fork() -> None:
+            # A forked child has only the thread that forked it: loads started
+            # by other threads never finish there, and the lock may be held.
+            nonlocal lock
+            lock = threading.Lock()
+            flights.clear()
+
+        os.register_at_fork(after_in_child=reset_after_fork)
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        LOADERS[loader.__qualname__] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def loader_cache_info() -> pd.DataFrame:
+    """Get cache statistics for every `single_flight` loader.
+
+    Returns:
+        pandas.DataFrame: Hits, loads, waits (i.e. duplicate loads avoided)
+            and cache size for each loader.
+    """
+    return pd.DataFrame(
+        [loader.cache_info() for loader in LOADERS.values()],
+        index=list(LOADERS),
+    )
+
+
+def latest_day_columns() -> list[str]:
+    """Get the latest-day columns that the dashboard uses.
+
+    Returns:
+        list[str]: Every column in `LATEST_DAY_COLUMNS`, once each.
+    """
+    return list(dict.fromkeys(chain(*LATEST_DAY_COLUMNS.values())))
+
+
+@single_flight(maxsize=2)
 def load_latest_day_data(date: date = TODAY) -> pd.DataFrame:
-    """Get cleaned COVID-19 data for the latest day.
+    """Get cleaned COVID-19 data for the latest day, with only the columns
+    that the dashboard uses.
 
     Args:
         date (date): The current date.
@@ -120,11 +405,63 @@ def load_latest_day_data(date: date = TODAY) -> pd.DataFrame:
     """
     return pd.read_csv(
         f"{PROCESSED_DATA_URL}/latest-data.csv",
+        usecols=latest_day_columns(),
+        parse_dates=["Last Updated Date"],
+    )
+
+
+@single_flight(maxsize=2)
+def load_full_latest_day_data(date: date = TODAY) -> pd.DataFrame:
+    """Get cleaned COVID-19 data for the latest day, with every column.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        pandas.DataFrame: COVID-19 info for the latest day.
+    """
+    return pd.read_csv(
+        f"{PROCESSED_DATA_URL}/latest-data.csv",
+        parse_dates=["Last Updated Date"],
+    )
+
+
+@single_flight(maxsize=2)
+def load_snapshot_dates(date: date = TODAY) -> list[date]:
+    """Get the dates of the available daily snapshots.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        list[date]: Snapshot dates, oldest first.
+    """
+    dates = pd.read_csv(
+        f"{PROCESSED_DATA_URL}/snapshots/dates.csv", parse_dates=["Date"]
+    )
+    return dates["Date"].dt.date.to_list()
+
+
+# Keep about a week of recently viewed snapshots in memory
+@single_flight(maxsize=8)
+def load_snapshot(snapshot_date: date) -> pd.DataFrame:
+    """Get the latest-day data as it was on `snapshot_date`.
+
+    Args:
+        snapshot_date (date): One of the dates from `load_snapshot_dates`.
+
+    Returns:
+        pandas.DataFrame: COVID-19 info as at `snapshot_date`, with only the
+            columns that the dashboard uses.
+    """
+    return pd.read_csv(
+        f"{PROCESSED_DATA_URL}/snapshots/{snapshot_date}.csv.gz",
+        usecols=latest_day_columns(),
         parse_dates=["Last Updated Date"],
     )
 
 
-@lru_cache(maxsize=2)
+@single_flight(maxsize=2)
 def load_time_series_data(date: date = TODAY) -> pd.DataFrame:
     """Get cleaned COVID-19 time series data.
 
@@ -139,7 +476,7 @@ def load_time_series_data(date: date = TODAY) -> pd.DataFrame:
     )
 
 
-@lru_cache(maxsize=2)
+@single_flight(maxsize=2)
 def load_30_day_diff(date: date = TODAY) -> pd.DataFrame:
     """Get daily differences for the last 30 days..
 
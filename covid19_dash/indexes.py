@@ -0,0 +1,378 @@
+import hashlib
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from covid19_dash.countries import CountryRegistry, load_country_registry
+from covid19_dash.data import (
+    GLOBAL_METRICS,
+    TODAY,
+    single_flight,
+    load_30_day_diff,
+    load_full_latest_day_data,
+    load_latest_day_data,
+    load_time_series_data,
+)
+
+
+class TimeSeriesIndex:
+    """Time series data sorted by country id then date, so that any country's
+    values within a date range are found by binary search.
+
+    Args:
+        data (pandas.DataFrame): Time series data with an "Iso Code" column.
+        registry (CountryRegistry): Registry used to assign country ids.
+    """
+
+    def __init__(self, data: pd.DataFrame, registry: CountryRegistry) -> None:
+        country_ids = registry.ids(data["Iso Code"])
+        order = np.lexsort((data["Date"].to_numpy(), country_ids))
+        self.data = data.iloc[order].assign(
+            **{"Country Id": country_ids[order]}
+        )
+        self.data.reset_index(drop=True, inplace=True)
+        self.dates = self.data["Date"].to_numpy()
+        # Rows for country `i` are at positions [bounds[i], bounds[i + 1])
+        self._bounds = np.searchsorted(
+            self.data["Country Id"].to_numpy(), np.arange(len(registry) + 1)
+        )
+
+    @property
+    def start_date(self) -> pd.Timestamp:
+        return pd.Timestamp(self.dates.min())
+
+    @property
+    def end_date(self) -> pd.Timestamp:
+        return pd.Timestamp(self.dates.max())
+
+    def positions(
+        self,
+        country_ids: Iterable[int],
+        start: str | date | None = None,
+        end: str | date | None = None,
+    ) -> np.ndarray:
+        """Get the row positions of `country_ids` between `start` and `end`.
+
+        Args:
+            country_ids (Iterable[int]): Country ids.
+            start (str | date | None, optional): First date (inclusive).
+                Defaults to None, i.e. no lower bound.
+            end (str | date | None, optional): Last date (inclusive).
+                Defaults to None, i.e. no upper bound.
+
+        Returns:
+            numpy.ndarray: Row positions in `data`.
+        """
+        start = np.datetime64(start or self.start_date, "ns")
+        end = np.datetime64(end or self.end_date, "ns")
+        slices = []
+        for country_id in country_ids:
+            if not 0 <= country_id < len(self._bounds) - 1:
+                continue
+            lo, hi = self._bounds[country_id], self._bounds[country_id + 1]
+            dates = self.dates[lo:hi]
+            slices.append(
+                np.arange(
+                    lo + np.searchsorted(dates, start, side="left"),
+                    lo + np.searchsorted(dates, end, side="right"),
+                )
+            )
+        return np.concatenate(slices) if slices else np.array([], dtype=int)
+
+    def select(
+        self,
+        country_ids: Iterable[int],
+        start: str | date | None = None,
+        end: str | date | None = None,
+    ) -> pd.DataFrame:
+        """Get time series data for `country_ids` between `start` and `end`.
+
+        Args:
+            country_ids (Iterable[int]): Country ids.
+            start (str | date | None, optional): First date (inclusive).
+                Defaults to None, i.e. no lower bound.
+            end (str | date | None, optional): Last date (inclusive).
+                Defaults to None, i.e. no upper bound.
+
+        Returns:
+            pandas.DataFrame: Matching rows, sorted by country then date.
+        """
+        return self.data.iloc[self.positions(country_ids, start, end)]
+
+
+class MetricRankings:
+    """Countries ranked by each metric, overall and within each continent.
+
+    Rankings are computed once, so that getting the top or bottom countries
+    for a metric is a slice rather than a sort.
+
+    Args:
+        data (pandas.DataFrame): Latest-day data.
+        metrics (Iterable[str]): Columns to rank countries by.
+    """
+
+    def __init__(self, data: pd.DataFrame, metrics: Iterable[str]) -> None:
+        metrics = list(metrics)
+        self.data = data[["Location", "Continent", *metrics]].reset_index(
+            drop=True
+        )
+        continents = self.data["Continent"].to_numpy()
+        self.continents = sorted(self.data["Continent"].dropna().unique())
+        self._orders = {}
+        for metric in metrics:
+            values = self.data[metric].to_numpy(dtype=float)
+            # Descending order, without missing values
+            order = np.argsort(-values, kind="stable")
+            order = order[~np.isnan(values[order])]
+            self._orders[metric, None] = order
+            for continent in self.continents:
+                self._orders[metric, continent] = order[
+                    continents[order] == continent
+                ]
+
+    def rank(
+        self,
+        metric: str,
+        n: int,
+        continent: str | None = None,
+        bottom: bool = False,
+    ) -> pd.DataFrame:
+        """Get the `n` countries with the highest (or lowest) `metric`.
+
+        Args:
+            metric (str): Metric to rank by.
+            n (int): Number of countries.
+            continent (str | None, optional): Only rank countries in this
+                continent. Defaults to None, i.e. all countries.
+            bottom (bool, optional): Get the lowest values instead. Defaults
+                to False.
+
+        Returns:
+            pandas.DataFrame: "Location" and `metric` for the selected
+                countries, in rank order. Empty for continents that are not
+                in the data.
+        """
+        order = self._orders.get(
+            (metric, continent), self._orders[metric, None][:0]
+        )
+        positions = order[::-1][:n] if bottom else order[:n]
+        return self.data.iloc[positions][["Location", metric]]
+
+
+class SimilarCurves:
+    """Countries' per-capita time series as rows of a feature matrix, for
+    finding the countries whose curves are nearest to a given country's.
+
+    Each row holds a country's values per million people on every date in
+    the data, log-scaled so that curves are compared by relative, rather than
+    absolute, differences. Countries without a population, or without time
+    series data, are left out.
+
+    Args:
+        index (TimeSeriesIndex): Time series data.
+        population (numpy.ndarray): Population of each country, by id.
+        metrics (Iterable[str], optional): Time series columns to index.
+            Defaults to "Confirmed" and "Deaths".
+    """
+
+    def __init__(
+        self,
+        index: TimeSeriesIndex,
+        population: np.ndarray,
+        metrics: Iterable[str] = ("Confirmed", "Deaths"),
+    ) -> None:
+        dates, date_positions = np.unique(index.dates, return_inverse=True)
+        country_ids = index.data["Country Id"].to_numpy()
+        # Rows of countries with a known population
+        has_population = np.zeros(len(country_ids), dtype=bool)
+        known = country_ids >= 0
+        has_population[known] = population[country_ids[known]] > 0
+        country_ids = country_ids[has_population]
+        date_positions = date_positions[has_population]
+        per_million = 1e6 / population[country_ids]
+
+        self.country_ids = np.unique(country_ids)
+        # Row of each country id in the feature matrices, or -1
+        self._rows = np.full(len(population), -1)
+        self._rows[self.country_ids] = np.arange(len(self.country_ids))
+
+        self._features = {}
+        self._squared_norms = {}
+        for metric in metrics:
+            values = index.data[metric].to_numpy(dtype=float)[has_population]
+            features = np.zeros((len(self.country_ids), len(dates)))
+            features[self._rows[country_ids], date_positions] = np.nan_to_num(
+                np.log1p(np.clip(values * per_million, 0, None))
+            )
+            self._features[metric] = features
+            self._squared_norms[metric] = np.einsum(
+                "ij,ij->i", features, features
+            )
+
+    def nearest(self, country_id: int, metric: str, k: int) -> np.ndarray:
+        """Get the `k` countries with curves most similar to a country's.
+
+        Args:
+            country_id (int): Country to compare against.
+            metric (str): Time series column to compare.
+            k (int): Number of countries.
+
+        Returns:
+            numpy.ndarray: Country ids, nearest first, excluding
+                `country_id`. Empty if the country is not indexed.
+        """
+        if not 0 <= country_id < len(self._rows):
+            return np.array([], dtype=int)
+        row = self._rows[country_id]
+        if row < 0:
+            return np.array([], dtype=int)
+        features = self._features[metric]
+        norms = self._squared_norms[metric]
+        # Squared Euclidean distances from the country to every other one
+        distances = norms - 2 * features @ features[row] + norms[row]
+        distances[row] = np.inf
+        k = min(k, len(distances) - 1)
+        nearest = np.argpartition(distances, k)[:k]
+        return self.country_ids[nearest[np.argsort(distances[nearest])]]
+
+
+class ColumnTable:
+    """The columns of a frame as arrays of JSON-ready values, so that rows can
+    be served by position without any per-request DataFrame work.
+
+    Dates are stored as ISO 8601 strings, and missing values as None.
+
+    Args:
+        data (pandas.DataFrame): Data to serve.
+    """
+
+    def __init__(self, data: pd.DataFrame) -> None:
+        self.columns = {
+            name: _json_values(column) for name, column in data.items()
+        }
+        self.n_rows = len(data)
+        digest = hashlib.sha256(
+            pd.util.hash_pandas_object(data, index=False).to_numpy()
+        )
+        digest.update(",".join(data.columns).encode())
+        # Changes whenever the data does, for use in ETags
+        self.version = digest.hexdigest()[:12]
+
+    def project(
+        self, columns: Iterable[str], positions: np.ndarray | None = None
+    ) -> dict[str, list]:
+        """Get the values of `columns` at the given row positions.
+
+        Args:
+            columns (Iterable[str]): Column names.
+            positions (numpy.ndarray | None, optional): Row positions.
+                Defaults to None, i.e. all rows.
+
+        Returns:
+            dict[str, list]: Values, keyed by column name.
+        """
+        if positions is None:
+            return {name: self.columns[name].tolist() for name in columns}
+        return {
+            name: self.columns[name].take(positions).tolist()
+            for name in columns
+        }
+
+
+def _json_values(column: pd.Series) -> np.ndarray:
+    """Convert a column to an object array of JSON-serializable values."""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        column = column.dt.strftime("%Y-%m-%d")
+    return column.astype(object).where(column.notna(), None).to_numpy()
+
+
+@single_flight(maxsize=2)
+def load_time_series_index(date: date = TODAY) -> TimeSeriesIndex:
+    """Get the time series data index.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        TimeSeriesIndex: Time series data, indexed by country and date.
+    """
+    return TimeSeriesIndex(
+        load_time_series_data(date), load_country_registry(date)
+    )
+
+
+@single_flight(maxsize=2)
+def load_metric_rankings(date: date = TODAY) -> MetricRankings:
+    """Get rankings of countries by each of the global dashboard metrics.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        MetricRankings: Latest-day rankings.
+    """
+    return MetricRankings(load_latest_day_data(date), GLOBAL_METRICS)
+
+
+@single_flight(maxsize=2)
+def load_similar_curves(date: date = TODAY) -> SimilarCurves:
+    """Get the index of countries' per-capita time series.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        SimilarCurves: Per-capita curves, for similarity search.
+    """
+    registry = load_country_registry(date)
+    latest_data = load_latest_day_data(date)
+    population = np.full(len(registry), np.nan)
+    population[registry.ids(latest_data["Iso Code"])] = latest_data[
+        "Population"
+    ]
+    return SimilarCurves(load_time_series_index(date), population)
+
+
+@single_flight(maxsize=2)
+def load_time_series_table(date: date = TODAY) -> ColumnTable:
+    """Get the time series data as a column table, with rows in the same
+    order as the time series index.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        ColumnTable: Time series data, sorted by country id then date.
+    """
+    index = load_time_series_index(date)
+    return ColumnTable(index.data.drop(columns="Country Id"))
+
+
+@single_flight(maxsize=2)
+def load_latest_day_table(date: date = TODAY) -> ColumnTable:
+    """Get the latest day's data, with every column, as a column table with
+    one row per country in the country registry, in id order.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        ColumnTable: Latest-day data, where row positions are country ids.
+    """
+    data = load_full_latest_day_data(date).drop_duplicates("Iso Code")
+    return ColumnTable(data.sort_values("Iso Code").reset_index(drop=True))
+
+
+@single_flight(maxsize=2)
+def load_30_day_diff_table(date: date = TODAY) -> ColumnTable:
+    """Get the last 30 days' daily differences as a column table.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        ColumnTable: Daily changes, oldest first.
+    """
+    return ColumnTable(load_30_day_diff(date).reset_index())
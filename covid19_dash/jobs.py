@@ -0,0 +1,269 @@
+import hashlib
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date
+from multiprocessing.pool import AsyncResult, Pool
+
+import diskcache
+import numpy as np
+import pandas as pd
+from dash import DiskcacheManager
+
+from covid19_dash.data import TODAY, load_latest_day_data, single_flight
+
+CACHE_DIR = os.environ.get(
+    "CALLBACK_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "covid19-dash-callbacks"),
+)
+WORKERS = int(os.environ.get("CALLBACK_WORKERS", 2))
+# Jobs allowed to wait for or run in the workers at once
+MAX_JOBS = int(os.environ.get("CALLBACK_MAX_JOBS", 8))
+# Seconds after which an unfinished job is assumed lost, e.g. with a worker
+# that crashed
+JOB_TIMEOUT = float(os.environ.get("CALLBACK_JOB_TIMEOUT", 300))
+# Number of recent jobs that durations are kept for
+SAMPLES = 100
+# Keep results for repeated requests, e.g. the same map, for a day
+RESULT_EXPIRY = 24 * 60 * 60
+
+
+class JobBacklogFull(Exception):
+    """Raised when a job is submitted while the workers already have
+    `max_jobs` jobs.
+
+    Args:
+        retry_after (int): Estimated seconds until a job finishes.
+    """
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Too many background jobs, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ProcessPoolManager(DiskcacheManager):
+    """Run background callbacks in a fixed pool of worker processes, and keep
+    their results in a local disk cache.
+
+    Unlike `DiskcacheManager`, which starts a new process for every job, the
+    workers are reused, so data they load stays cached between jobs. Workers
+    are forked by `start`, once every callback has been registered, so only
+    the callback's key and arguments need to be sent to them.
+
+    Args:
+        cache (diskcache.Cache): Store for results and progress updates.
+        processes (int): Number of worker processes.
+        cache_by (list, optional): Functions whose return values are added to
+            result cache keys. Defaults to None, i.e. results are not reused.
+        expire (int, optional): Seconds to keep cached results for.
+        max_jobs (int, optional): Jobs allowed to wait for or run in the
+            workers at once. Further jobs raise `JobBacklogFull`. Defaults to
+            None, i.e. no limit.
+        job_timeout (float, optional): Seconds after which an unfinished job
+            is no longer counted or polled for, since the worker running it
+            may have died. Defaults to None, i.e. jobs never time out.
+    """
+
+    def __init__(
+        self,
+        cache: diskcache.Cache,
+        processes: int,
+        cache_by: list | None = None,
+        expire: int | None = None,
+        max_jobs: int | None = None,
+        job_timeout: float | None = None,
+    ) -> None:
+        super().__init__(cache, cache_by=cache_by, expire=expire)
+        self.processes = processes
+        self.max_jobs = max_jobs
+        self.job_timeout = job_timeout
+        self.submitted = 0
+        self.rejected = 0
+        self.lost = 0
+        # Deadlines of jobs submitted to the workers that have not finished
+        self._deadlines: dict[str, float] = {}
+        self._pool = None
+        self._jobs: dict[str, AsyncResult] = {}
+        self._durations = deque(maxlen=SAMPLES)
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Fork the worker processes, if not yet running.
+
+        Call this before the server starts its request threads: a process
+        forked while other threads run gets copies of their locks, in
+        whatever state those threads left them.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = multiprocessing.get_context("fork").Pool(
+                    self.processes
+                )
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, and forget their jobs."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+            self._jobs.clear()
+            self._deadlines.clear()
+
+    @property
+    def backlog(self) -> int:
+        """int: Jobs submitted to the workers that have not finished."""
+        return len(self._deadlines)
+
+    @property
+    def pool(self) -> Pool:
+        # Not started on demand: that would fork from a request thread
+        if self._pool is None:
+            raise RuntimeError("The worker processes have not been started")
+        return self._pool
+
+    def call_job_fn(self, key, job_fn, args, context) -> str:
+        job = uuid.uuid4().hex
+        if self.cache_by is not None and _reusable(self.handle.get(key)):
+            return job  # Reuse the stored result instead of recomputing it
+
+        func_key = next(
+            func_key
+            for func_key, func in self.func_registry.items()
+            if func is job_fn
+        )
+        pool = self.pool
+        submitted = time.perf_counter()
+        with self._lock:
+            self._forget_lost_jobs()
+            if self.max_jobs is not None and self.backlog >= self.max_jobs:
+                self.rejected += 1
+                raise JobBacklogFull(self._retry_after())
+            self._deadlines[job] = submitted + (self.job_timeout or math.inf)
+            self.submitted += 1
+
+        def finished(_) -> None:
+            with self._lock:
+                # A job that finishes after its deadline was already let go
+                if self._deadlines.pop(job, None) is not None:
+                    self._durations.append(time.perf_counter() - submitted)
+
+        result = pool.apply_async(
+            _run_job,
+            (func_key, key, self._make_progress_key(key), args, dict(context)),
+            callback=finished,
+            error_callback=finished,
+        )
+        with self._lock:
+            # Forget finished jobs: their results are read from the cache
+            self._jobs = {
+                other_job: other_result
+                for other_job, other_result in self._jobs.items()
+                if not other_result.ready()
+            }
+            self._jobs[job] = result
+        return job
+
+    def _forget_lost_jobs(self) -> None:
+        """Stop counting and tracking jobs past their deadline, so that a
+        worker that died mid-job does not hold a place in the backlog, or keep
+        browsers polling, forever. Call with the lock held."""
+        now = time.perf_counter()
+        for job in [job for job, end in self._deadlines.items() if end < now]:
+            del self._deadlines[job]
+            self._jobs.pop(job, None)
+            self.lost += 1
+
+    def _retry_after(self) -> int:
+        """Estimate the seconds until the workers finish a job. Call with the
+        lock held."""
+        duration = np.mean(self._durations or [1.0])
+        return max(1, math.ceil(self.backlog * duration / self.processes))
+
+    def stats(self) -> dict:
+        """Get the worker pool's job limit, backlog, rejections and lost jobs.
+
+        Returns:
+            dict: Statistics.
+        """
+        with self._lock:
+            self._forget_lost_jobs()
+            return {
+                "processes": self.processes,
+                "max_jobs": self.max_jobs,
+                "backlog": self.backlog,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "lost": self.lost,
+            }
+
+    def get_result(self, key, job):
+        result = super().get_result(key, job)
+        if not _reusable(result):
+            # Report errors once, so that the next request runs the job again
+            self.clear_cache_entry(key)
+        return result
+
+    def job_running(self, job) -> bool:
+        with self._lock:
+            self._forget_lost_jobs()
+            result = self._jobs.get(job)
+        return result is not None and not result.ready()
+
+    def terminate_job(self, job) -> None:
+        # Pool tasks cannot be cancelled individually: stop tracking the job,
+        # and let its result expire from the cache.
+        self._jobs.pop(job, None)
+
+    def terminate_unhealthy_job(self, job) -> bool:
+        if job in self._jobs and not self.job_running(job):
+            self.terminate_job(job)
+            return True
+        return False
+
+
+@single_flight(maxsize=2)
+def data_version(date: date = TODAY) -> str:
+    """Identify the loaded data, so that stored callback results are only
+    reused while it is unchanged.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        str: A hash of the latest day's data, in the columns the dashboard
+            uses.
+    """
+    data = load_latest_day_data(date)
+    digest = hashlib.sha256(
+        pd.util.hash_pandas_object(data, index=False).to_numpy()
+    )
+    return digest.hexdigest()[:12]
+
+
+def _reusable(result) -> bool:
+    """Check that a stored callback result exists and is not an error."""
+    return result is not None and not (
+        isinstance(result, dict) and "long_callback_error" in result
+    )
+
+
+def _run_job(func_key: str, *job_args) -> None:
+    """Run a registered background callback in a pool worker."""
+    background_callback_manager.func_registry[func_key](*job_args)
+
+
+background_callback_manager = ProcessPoolManager(
+    diskcache.Cache(CACHE_DIR),
+    processes=WORKERS,
+    # Results are valid for as long as the data is
+    cache_by=[data_version],
+    expire=RESULT_EXPIRY,
+    max_jobs=MAX_JOBS,
+    job_timeout=JOB_TIMEOUT,
+)
@@ -0,0 +1,553 @@
+"""Replay realistic dashboard traffic against the Flask server, and report
+throughput and latency for each callback.
+
+Examples:
+    python -m covid19_dash.loadtest --concurrency 1 4 16
+    python -m covid19_dash.loadtest --url http://localhost:8080
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain
+from typing import Callable, Iterator, NamedTuple
+
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+from covid19_dash import plotting
+from covid19_dash.admission import STATS_URL
+from covid19_dash.countries import load_country_registry
+from covid19_dash.data import (
+    GLOBAL_METRICS,
+    load_latest_day_data,
+    load_snapshot_dates,
+    loader_cache_info,
+)
+from covid19_dash.indexes import load_time_series_index
+
+CALLBACK_URL = "/_dash-update-component"
+PAGES = ["/", "/compare-countries", "/raw-values"]
+PAGES_WITH_GRAPHS = {"/", "/compare-countries"}
+# Seconds between checks for background callback results
+POLL_INTERVAL = 0.05
+# Seconds to wait for a response, or for a background callback result,
+# before counting the request as failed with status `TIMED_OUT`
+TIMEOUT = 60
+TIMED_OUT = 504
+# plotly.js, as loaded by dcc.Graph
+PLOTLY_BUNDLE = "/_dash-component-suites/plotly/package_data/plotly.min.js"
+# Relative frequency of each user action
+SCENARIO_WEIGHTS = {
+    "map_category": 4,
+    "country_selection": 4,
+    "similar_countries": 1,
+    "raw_values_page": 1,
+    "download": 1,
+}
+# Page each user action happens on
+SCENARIO_PAGES = {
+    "map_category": "/",
+    "country_selection": "/compare-countries",
+    "similar_countries": "/compare-countries",
+    "raw_values_page": "/raw-values",
+    "download": "/raw-values",
+}
+
+
+class Request(NamedTuple):
+    name: str
+    path: str
+    body: dict | None = None
+
+
+class Result(NamedTuple):
+    name: str
+    status: int
+    latency: float
+    size: int
+
+
+class InProcessClient:
+    """Send requests to the Flask `server` without a network hop."""
+
+    def __init__(self) -> None:
+        from covid19_dash import server
+
+        self._client = server.test_client()
+
+    def send(self, request: Request) -> tuple[int, bytes]:
+        if request.body is None:
+            response = self._client.get(request.path)
+        else:
+            response = self._client.post(request.path, json=request.body)
+        return response.status_code, response.data
+
+
+class HTTPClient:
+    """Send requests to a running server, e.g. one started with
+    `waitress-serve`."""
+
+    def __init__(self, url: str, timeout: float = TIMEOUT) -> None:
+        self._url = url.rstrip("/")
+        self._timeout = timeout
+
+    def send(self, request: Request) -> tuple[int, bytes]:
+        data = headers = None
+        if request.body is not None:
+            data = json.dumps(request.body).encode()
+            headers = {"Content-Type": "application/json"}
+        http_request = urllib.request.Request(
+            self._url + request.path, data=data, headers=headers or {}
+        )
+        try:
+            with urllib.request.urlopen(
+                http_request, timeout=self._timeout
+            ) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+        except urllib.error.URLError as error:
+            if isinstance(error.reason, TimeoutError):  # While connecting
+                return TIMED_OUT, b""
+            raise
+        except TimeoutError:
+            return TIMED_OUT, b""
+
+
+def callback_request(
+    name: str,
+    outputs: list[tuple[str, str]],
+    inputs: dict[str, object],
+    state: dict[str, object] | None = None,
+) -> Request:
+    """Build a `_dash-update-component` request, as sent by the browser.
+
+    Args:
+        name (str): Label used when reporting.
+        outputs (list[tuple[str, str]]): (component id, property) pairs.
+        inputs (dict[str, object]): Values keyed by "component-id.property".
+        state (dict[str, object] | None, optional): State values, keyed like
+            `inputs`. Defaults to None.
+
+    Returns:
+        Request: The callback request.
+    """
+    output_specs = [
+        {"id": component, "property": prop} for component, prop in outputs
+    ]
+    body = {
+        "output": (
+            f"{outputs[0][0]}.{outputs[0][1]}"
+            if len(outputs) == 1
+            else "..{}..".format(
+                "...".join(
+                    f"{component}.{prop}" for component, prop in outputs
+                )
+            )
+        ),
+        "outputs": output_specs[0] if len(outputs) == 1 else output_specs,
+        "inputs": _values(inputs),
+        "changedPropIds": list(inputs),
+        "state": _values(state or {}),
+    }
+    return Request(name, CALLBACK_URL, body)
+
+
+def _values(values: dict[str, object]) -> list[dict]:
+    """Convert values keyed by "component-id.property" to Dash's format."""
+    return [
+        {
+            "id": key.rsplit(".", 1)[0],
+            "property": key.rsplit(".", 1)[1],
+            "value": value,
+        }
+        for key, value in values.items()
+    ]
+
+
+def scenario_requests(scenario: str, rng: random.Random) -> list[Request]:
+    """Get the requests a browser sends for a single user action, starting
+    with the page it happens on.
+
+    Args:
+        scenario (str): One of the `SCENARIO_WEIGHTS` keys.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        list[Request]: Requests, in the order they are sent.
+    """
+    page = SCENARIO_PAGES[scenario]
+    return [Request(f"GET {page}", page)] + _callback_requests(scenario, rng)
+
+
+def _callback_requests(scenario: str, rng: random.Random) -> list[Request]:
+    """Get the callback requests for a single user action."""
+    if scenario == "map_category":
+        category = {"column-selector.value": rng.choice(GLOBAL_METRICS)}
+        snapshot = rng.randrange(len(load_snapshot_dates()))
+        return [
+            callback_request(
+                "plot_map",
+                [("global-choropleth-map", "figure")],
+                {**category, "snapshot-date.value": snapshot},
+            ),
+            callback_request(
+                "plot_metrics", [("totals", "children")], category
+            ),
+            callback_request(
+                "show_leaderboard",
+                [("leaderboard", "children")],
+                {
+                    **category,
+                    "leaderboard-order.value": "top",
+                    "leaderboard-size.value": 10,
+                    "leaderboard-continent.value": None,
+                },
+            ),
+        ]
+    elif scenario == "country_selection":
+        iso_codes = rng.sample(
+            list(load_country_registry().iso_codes), rng.randint(1, 8)
+        )
+        category = rng.choice(["Confirmed", "Deaths"])
+        start_date = rng.choice([None, "2021-01-01", "2022-01-01"])
+        return [
+            callback_request(
+                "plot_lineplots",
+                [("line-plot", "figure")],
+                {
+                    "countries.value": iso_codes,
+                    "info-category.value": category,
+                    "date-range.start_date": start_date,
+                    "date-range.end_date": None,
+                },
+            ),
+            callback_request(
+                "plot_column_charts",
+                [("column-charts", "children")],
+                {"countries.value": iso_codes},
+            ),
+        ]
+    elif scenario == "similar_countries":
+        return [
+            callback_request(
+                "find_similar_countries",
+                [("countries", "value")],
+                {
+                    "similar-country.value": rng.choice(
+                        load_country_registry().iso_codes
+                    )
+                },
+                {"info-category.value": rng.choice(["Confirmed", "Deaths"])},
+            )
+        ]
+    elif scenario == "raw_values_page":
+        return [
+            callback_request(
+                "raw_values_layout",
+                [("_pages_content", "children"), ("_pages_store", "data")],
+                {
+                    "_pages_location.pathname": "/raw-values",
+                    "_pages_location.search": "",
+                },
+            ),
+        ]
+    elif scenario == "download":
+        return [
+            callback_request(
+                "download_global_dataset",
+                [("download-dataset", "data")],
+                {"download-button.n_clicks": rng.randint(1, 5)},
+            )
+        ]
+    raise ValueError(f"Unknown scenario: {scenario!r}")
+
+
+def poll_background_job(
+    client: InProcessClient | HTTPClient,
+    request: Request,
+    job: dict,
+    timeout: float = TIMEOUT,
+) -> tuple[int, bytes]:
+    """Poll a background callback until its result is ready, as the browser
+    does.
+
+    Args:
+        client (InProcessClient | HTTPClient): Client that sent `request`.
+        request (Request): The callback request.
+        job (dict): The server's reply, with "cacheKey" and "job" ids.
+        timeout (float, optional): Seconds to wait for the result. Defaults
+            to `TIMEOUT`.
+
+    Returns:
+        tuple[int, bytes]: Status code and content of the final response,
+            or `TIMED_OUT` and no content if the result is not ready in
+            time.
+    """
+    query = urllib.parse.urlencode(
+        {"cacheKey": job["cacheKey"], "job": job["job"]}
+    )
+    poll = request._replace(path=f"{request.path}?{query}")
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        time.sleep(POLL_INTERVAL)
+        status, content = client.send(poll)
+        if status != 200 or b'"response"' in content:
+            return status, content
+    return TIMED_OUT, b""
+
+
+def replay_sessions(n_actions: int, seed: int = 0) -> Iterator[list[Request]]:
+    """Generate sessions for a random mix of user actions.
+
+    Args:
+        n_actions (int): Number of user actions to simulate.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Yields:
+        list[Request]: The requests for each user action, starting with its
+            page.
+    """
+    rng = random.Random(seed)
+    scenarios = rng.choices(
+        list(SCENARIO_WEIGHTS), weights=SCENARIO_WEIGHTS.values(), k=n_actions
+    )
+    for scenario in scenarios:
+        yield scenario_requests(scenario, rng)
+
+
+def run(
+    make_client: Callable[[], InProcessClient | HTTPClient],
+    concurrency: int,
+    n_actions: int,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Replay callback traffic with `concurrency` simultaneous users.
+
+    Each user sends the requests for one action in order, as a browser does,
+    starting with the page the action happens on.
+
+    Args:
+        make_client (Callable): Creates a client for each worker thread.
+        concurrency (int): Number of worker threads.
+        n_actions (int): Number of user actions to simulate.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        pandas.DataFrame: Requests, errors, throughput and p50/p95/p99
+            latency (ms) and mean response size for each callback, plus an
+            overall total.
+    """
+    sessions = list(replay_sessions(n_actions, seed))
+    local = threading.local()
+
+    def timed_send(request: Request) -> Result:
+        if not hasattr(local, "client"):
+            local.client = make_client()
+        start = time.perf_counter()
+        status, content = local.client.send(request)
+        if content.startswith(b'{"cacheKey"'):
+            status, content = poll_background_job(
+                local.client, request, json.loads(content)
+            )
+        latency = time.perf_counter() - start
+        return Result(request.name, status, latency, len(content))
+
+    def send_session(requests: list[Request]) -> list[Result]:
+        return [timed_send(request) for request in requests]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = pd.DataFrame(
+            chain.from_iterable(pool.map(send_session, sessions))
+        )
+    elapsed = time.perf_counter() - start
+
+    return summarize(
+        pd.concat([results, results.assign(name="total")]), elapsed
+    )
+
+
+def summarize(results: pd.DataFrame, elapsed: float) -> pd.DataFrame:
+    """Aggregate request timings per callback.
+
+    Args:
+        results (pandas.DataFrame): "name", "status", "latency" (seconds)
+            and "size" (bytes) for each request.
+        elapsed (float): Wall-clock duration of the run, in seconds.
+
+    Returns:
+        pandas.DataFrame: Summary statistics, indexed by callback name.
+    """
+    grouped = results.groupby("name", sort=False)
+    latency_ms = grouped["latency"].quantile([0.5, 0.95, 0.99]).unstack() * 1e3
+    latency_ms.columns = ["p50 (ms)", "p95 (ms)", "p99 (ms)"]
+    summary = pd.DataFrame(
+        {
+            "requests": grouped.size(),
+            "errors": grouped["status"].agg(
+                lambda status: (status >= 400).sum()
+            ),
+            "req/s": grouped.size() / elapsed,
+            "KB/req": grouped["size"].mean() / 1024,
+        }
+    )
+    return summary.join(latency_ms).round(1)
+
+
+def page_weight(
+    client: InProcessClient | HTTPClient, pages: list[str] = PAGES
+) -> pd.DataFrame:
+    """Measure the bytes a browser downloads on first load of each page.
+
+    Counts the HTML plus the scripts and stylesheets it links to. plotly.js
+    is loaded on demand by `dcc.Graph`, so it is counted for pages with
+    graphs.
+
+    Args:
+        client (InProcessClient | HTTPClient): Client to fetch with.
+        pages (list[str], optional): Page paths. Defaults to `PAGES`.
+
+    Returns:
+        pandas.DataFrame: Number of local and external resources, and KB of
+            local resources, for each page.
+    """
+    _, plotly_js = client.send(Request("plotly.js", PLOTLY_BUNDLE))
+    weights = {}
+    for page in pages:
+        _, html = client.send(Request(page, page))
+        html = html.decode()
+        urls = re.findall(r'<script src="([^"]+)"', html) + re.findall(
+            r'<link rel="stylesheet" href="([^"]+)"', html
+        )
+        external = [url for url in urls if url.startswith("http")]
+        size = len(html) + sum(
+            len(client.send(Request(url, url))[1])
+            for url in urls
+            if url not in external
+        )
+        local_files = len(urls) - len(external) + 1  # Including the HTML
+        if page in PAGES_WITH_GRAPHS:
+            size += len(plotly_js)
+            local_files += 1
+        weights[page] = {
+            "local files": local_files,
+            "external files": len(external),
+            "KB": round(size / 1024),
+        }
+    return pd.DataFrame(weights).T
+
+
+def figure_payloads(repeat: int = 5) -> pd.DataFrame:
+    """Measure how long each figure type takes to encode as a callback
+    response, and the response size, with plain JSON arrays and with typed
+    arrays.
+
+    Args:
+        repeat (int, optional): Encodings to time, of which the fastest is
+            reported. Defaults to 5.
+
+    Returns:
+        pandas.DataFrame: KB and milliseconds per figure type and encoding.
+    """
+    countries = range(0, len(load_country_registry()), 25)
+    latest_data = load_latest_day_data()
+    figures = {
+        "plot_lines": plotting.plot_lines(
+            load_time_series_index().select(countries), "Deaths"
+        ),
+        "plot_global_map": plotting.plot_global_map(
+            latest_data.fillna({"Total Cases": 0}), "Total Cases", "today"
+        ),
+        "plot_column_chart": plotting.plot_column_chart(
+            latest_data.iloc[list(countries)], "Total Cases"
+        ),
+    }
+    encoders = {
+        "JSON": to_json_plotly,
+        "typed arrays": lambda fig: to_json_plotly(
+            plotting.to_typed_arrays(fig)
+        ),
+    }
+    payloads = {}
+    for name, fig in figures.items():
+        for encoding, encode in encoders.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                payload = encode(fig)
+                timings.append(time.perf_counter() - start)
+            payloads[name, encoding] = {
+                "KB": round(len(payload) / 1024, 1),
+                "encode (ms)": round(min(timings) * 1e3, 2),
+            }
+    return pd.DataFrame(payloads).T
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url",
+        help="Server to load, e.g. http://localhost:8080. If omitted, "
+        "requests are sent to the app in-process.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16],
+        help="Numbers of simultaneous users to try.",
+    )
+    parser.add_argument(
+        "--actions",
+        type=int,
+        default=200,
+        help="User actions to replay at each concurrency level.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--page-weight",
+        action="store_true",
+        help="Report first-load bytes for each page instead.",
+    )
+    parser.add_argument(
+        "--figures",
+        action="store_true",
+        help="Report encode time and size for each figure type instead.",
+    )
+    args = parser.parse_args()
+
+    if args.url:
+        make_client = partial(HTTPClient, args.url)
+    else:
+        make_client = InProcessClient
+
+    if args.page_weight:
+        print(page_weight(make_client()).to_string())
+        return
+    if args.figures:
+        print(figure_payloads().to_string())
+        return
+
+    for concurrency in args.concurrency:
+        summary = run(make_client, concurrency, args.actions, args.seed)
+        print(f"\nConcurrency: {concurrency}\n{summary.to_string()}")
+
+    _, stats = make_client().send(Request("admission stats", STATS_URL))
+    stats = pd.DataFrame.from_dict(json.loads(stats), orient="index")
+    print(f"\nAdmission control:\n{stats.to_string()}")
+    if not args.url:
+        print(f"\nData loader caches:\n{loader_cache_info().to_string()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,24 @@
 import dash
 from covid19_dash import plotting
-from covid19_dash.data import load_latest_day_data, load_time_series_data
-from dash import Input, Output, callback, dcc, html
+from covid19_dash.countries import load_country_registry
+from covid19_dash.data import COMPARE_METRICS, load_latest_day_data
+from covid19_dash.indexes import load_similar_curves, load_time_series_index
+from dash import Input, Output, State, callback, dcc, html
 from plotly.graph_objects import Figure
 
 dash.register_page(__name__, title="Compare Countries")
 
-time_series_data = load_time_series_data()
+registry = load_country_registry()
+time_series_index = load_time_series_index()
+similar_curves = load_similar_curves()
 latest_day_data = load_latest_day_data()
+# Countries are selected by ISO-3 code, and looked up by integer id
+countries = registry.options(time_series_index.data["Country Id"].unique())
 
-countries_in_ts = set(time_series_data["Country/Region"].unique())
-countries_in_latest = set(latest_day_data["Location"].unique())
-countries = sorted(countries_in_ts.intersection(countries_in_latest))
-
-EAST_AFRICA = [
-    "Burundi",
-    "Democratic Republic of Congo",
-    "Kenya",
-    "Rwanda",
-    "South Sudan",
-    "Tanzania",
-    "Uganda",
-]
+EAST_AFRICA = ["BDI", "COD", "KEN", "RWA", "SSD", "TZA", "UGA"]
 PLOT_CONFIG = {"displayModeBar": False}
+# Number of countries found by the similar curves search
+SIMILAR_COUNTRIES = 5
 
 layout = html.Div(
     [
@@ -42,6 +38,13 @@ layout = html.Div(
                             placeholder="Select a Country",
                             value=EAST_AFRICA,
                         ),
+                        # Select countries with similar curves to one
+                        dcc.Dropdown(
+                            id="similar-country",
+                            options=countries,
+                            placeholder="Find countries with curves similar "
+                            "to...",
+                        ),
                         # Select category
                         dcc.RadioItems(
                             id="info-category",
@@ -54,6 +57,15 @@ layout = html.Div(
                             ],
                             value="Confirmed",
                         ),
+                        # Select date range
+                        dcc.DatePickerRange(
+                            id="date-range",
+                            min_date_allowed=time_series_index.start_date,
+                            max_date_allowed=time_series_index.end_date,
+                            start_date=time_series_index.start_date,
+                            end_date=time_series_index.end_date,
+                            display_format="MMM D, YYYY",
+                        ),
                         # Line-plot
                         dcc.Loading(
                             id="line-plot-container",
@@ -79,25 +91,68 @@ layout = html.Div(
 )
 
 
+@callback(
+    Output("countries", "value"),
+    Input("similar-country", "value"),
+    State("info-category", "value"),
+    prevent_initial_call=True,
+)
+def find_similar_countries(country: str | None, category: str) -> list:
+    """Select a country, and the countries whose curves of `category` per
+    million people are most similar to it.
+
+    Args:
+        country (str | None): Selected country's ISO-3 code.
+        category (str): "Confirmed" or "Deaths".
+
+    Returns:
+        list: ISO-3 codes, the selected country first.
+    """
+    if country is None:  # If the search is cleared
+        return dash.no_update
+
+    nearest = similar_curves.nearest(
+        registry.ids([country])[0], category, SIMILAR_COUNTRIES
+    )
+    return [country, *registry.iso_codes[nearest]]
+
+
 @callback(
     Output("line-plot", "figure"),
-    [Input("countries", "value"), Input("info-category", "value")],
+    [
+        Input("countries", "value"),
+        Input("info-category", "value"),
+        Input("date-range", "start_date"),
+        Input("date-range", "end_date"),
+    ],
 )
-def plot_lineplots(countries: list, category: str) -> Figure:
-    """Get a line-plot of `category` for specified `countries`.
+def plot_lineplots(
+    countries: list,
+    category: str,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> dict:
+    """Get a line-plot of `category` for specified `countries`, between
+    `start_date` and `end_date`.
 
     Args:
-        countries (list): Selected countries.
+        countries (list): Selected ISO-3 codes.
         category (str): "Confirmed" or "Deaths".
+        start_date (str | None, optional): First date, e.g. "2021-01-31".
+            Defaults to None, i.e. the earliest date available.
+        end_date (str | None, optional): Last date. Defaults to None, i.e.
+            the latest date available.
 
     Returns:
-        plotly.graph_objs._figure.Figure: Comparative line-plot.
+        dict: Comparative line-plot, with typed arrays.
     """
     if not countries:  # If no country is selected
         countries = EAST_AFRICA
 
-    data = time_series_data.query("`Country/Region` in @countries")
-    return plotting.plot_lines(data, category)
+    data = time_series_index.select(
+        registry.ids(countries), start_date, end_date
+    )
+    return plotting.to_typed_arrays(plotting.plot_lines(data, category))
 
 
 @callback(
@@ -108,33 +163,26 @@ def plot_column_charts(countries: list) -> list[Figure]:
     """Get column-charts of metrics from the supplied `countries`.
 
     Args:
-        countries (list): Selected countries.
+        countries (list): Selected ISO-3 codes.
 
     Returns:
         list[Figure]: Comparative graphs.
     """
     if countries == []:  # If no country is selected
-        countries = ["Kenya", "Uganda", "Tanzania"]
+        countries = ["KEN", "UGA", "TZA"]
 
-    data = latest_day_data.query("Location in @countries")
+    data = latest_day_data[latest_day_data["Iso Code"].isin(countries)]
     column_charts = [
         html.Div(
             dcc.Graph(
                 id=f"{metric}-column-chart",
-                figure=plotting.plot_column_chart(data, metric),
+                figure=plotting.to_typed_arrays(
+                    plotting.plot_column_chart(data, metric)
+                ),
                 config=PLOT_CONFIG,
                 className="a-column-chart",
             )
         )
-        for metric in (
-            "Total Cases",
-            "Total Cases Per Million",
-            "Total Deaths",
-            "Total Deaths Per Million",
-            "People Fully Vaccinated",
-            "People Fully Vaccinated Per Hundred",
-            "Hospital Beds Per Thousand",
-            "Population Density",
-        )
+        for metric in COMPARE_METRICS
     ]
     return column_charts
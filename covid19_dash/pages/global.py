@@ -1,14 +1,24 @@
 import dash
+import numpy as np
 from dash import Input, Output, callback, dcc, html
-from plotly.graph_objects import Figure
 
 from covid19_dash import plotting
-from covid19_dash.data import load_30_day_diff, load_latest_day_data
+from covid19_dash.data import (
+    GLOBAL_METRICS,
+    load_30_day_diff,
+    load_latest_day_data,
+    load_snapshot,
+    load_snapshot_dates,
+)
+from covid19_dash.indexes import load_metric_rankings
 
 dash.register_page(__name__, path="/", title="COVID-19 Dashboard")
 
 PLOT_CONFIG = {"displayModeBar": False}
 
+SNAPSHOT_DATES = load_snapshot_dates()
+LATEST_SNAPSHOT = len(SNAPSHOT_DATES) - 1
+
 layout = html.Div(
     className="global-dashboard",
     children=[
@@ -21,19 +31,7 @@ layout = html.Div(
                 html.Label("Select Category", htmlFor="column-selector"),
                 dcc.Dropdown(
                     id="column-selector",
-                    options=[
-                        "New Cases",
-                        "Total Cases Per Million",
-                        "Total Cases",
-                        "Total Deaths",
-                        "People Fully Vaccinated Per Hundred",
-                        "People Fully Vaccinated",
-                        "Total Vaccinations",
-                        "Hospital Beds Per Thousand",
-                        "Aged 70 Older",
-                        "Diabetes Prevalence",
-                        "Life Expectancy",
-                    ],
+                    options=GLOBAL_METRICS,
                     value="New Cases",
                     clearable=False,
                     placeholder="Select category",
@@ -53,6 +51,54 @@ layout = html.Div(
                         ),
                     ],
                 ),
+                # Global map date selector
+                dcc.Slider(
+                    id="snapshot-date",
+                    min=0,
+                    max=LATEST_SNAPSHOT,
+                    step=1,
+                    value=LATEST_SNAPSHOT,
+                    marks={
+                        position: SNAPSHOT_DATES[position].strftime("%b %d %Y")
+                        for position in np.linspace(
+                            0, LATEST_SNAPSHOT, min(len(SNAPSHOT_DATES), 5)
+                        )
+                        .round()
+                        .astype(int)
+                        .tolist()
+                    },
+                ),
+                # Leaderboard for the selected category
+                html.Div(
+                    className="leaderboard",
+                    children=[
+                        dcc.RadioItems(
+                            id="leaderboard-order",
+                            options=[
+                                {"label": "Top", "value": "top"},
+                                {"label": "Bottom", "value": "bottom"},
+                            ],
+                            value="top",
+                            inline=True,
+                        ),
+                        dcc.Dropdown(
+                            id="leaderboard-size",
+                            className="leaderboard-selector",
+                            options=[5, 10, 20],
+                            value=10,
+                            clearable=False,
+                            searchable=False,
+                        ),
+                        dcc.Dropdown(
+                            id="leaderboard-continent",
+                            className="leaderboard-selector",
+                            options=load_metric_rankings().continents,
+                            placeholder="All continents",
+                            searchable=False,
+                        ),
+                        html.Table(id="leaderboard"),
+                    ],
+                ),
                 html.Div(
                     className="page-link",
                     children=[
@@ -121,23 +167,84 @@ def plot_metrics(category: str) -> list:
 
 @callback(
     Output("global-choropleth-map", "figure"),
-    Input("column-selector", "value"),
+    [Input("column-selector", "value"), Input("snapshot-date", "value")],
+    # Drawing a map is slow when it is not cached, so run it off the request
+    # threads
+    background=True,
+    interval=250,
 )
-def plot_map(category: str) -> tuple[list, Figure]:
-    """Create a choropleth map showing `category`s distribution globally.
+def plot_map(category: str, snapshot: int = LATEST_SNAPSHOT) -> dict:
+    """Create a choropleth map showing `category`s distribution globally, as
+    at the selected snapshot date.
 
     Args:
         category (str): The info to plot.
+        snapshot (int, optional): Position of the date in `SNAPSHOT_DATES`.
+            Defaults to the latest.
 
     Returns:
-        plotly.graph_objs._figure.Figure: A choropleth map.
+        dict: A choropleth map, with typed arrays.
     """
-    latest_data = load_latest_day_data()
+    if snapshot == LATEST_SNAPSHOT:
+        latest_data = load_latest_day_data()
+    else:  # Only the selected day's snapshot is loaded
+        latest_data = load_snapshot(SNAPSHOT_DATES[snapshot])
     data_date = latest_data["Last Updated Date"].max().strftime("%A, %b %d %Y")
 
-    # Negative and null values in the size parameter raise a ValueError
-    latest_data[category] = latest_data[category].clip(lower=0).fillna(0)
+    # Negative and null values in the size parameter raise a ValueError. Work
+    # on a copy to leave the cached data intact.
+    data = latest_data.assign(
+        **{category: latest_data[category].clip(lower=0).fillna(0)}
+    )
 
-    return plotting.plot_global_map(
-        latest_data, category=category, date=data_date
+    return plotting.to_typed_arrays(
+        plotting.plot_global_map(data, category=category, date=data_date)
     )
+
+
+@callback(
+    Output("leaderboard", "children"),
+    [
+        Input("column-selector", "value"),
+        Input("leaderboard-order", "value"),
+        Input("leaderboard-size", "value"),
+        Input("leaderboard-continent", "value"),
+    ],
+)
+def show_leaderboard(
+    category: str, order: str, size: int, continent: str | None
+) -> list:
+    """Create a table of the countries with the highest or lowest `category`
+    values.
+
+    Args:
+        category (str): The info to rank countries by.
+        order (str): "top" or "bottom".
+        size (int): Number of countries to list.
+        continent (str | None): Only list countries in this continent. If
+            None, list countries from all continents.
+
+    Returns:
+        list: Table header and body.
+    """
+    ranked = load_metric_rankings().rank(
+        category, size, continent=continent, bottom=order == "bottom"
+    )
+    rows = [
+        html.Tr(
+            [
+                html.Td(rank),
+                html.Td(location),
+                html.Td(f"{value:,.2f}".removesuffix(".00")),
+            ]
+        )
+        for rank, (location, value) in enumerate(
+            ranked.itertuples(index=False), start=1
+        )
+    ]
+    return [
+        html.Thead(
+            html.Tr([html.Th("#"), html.Th("Country"), html.Th(category)])
+        ),
+        html.Tbody(rows),
+    ]
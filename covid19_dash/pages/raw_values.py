@@ -1,17 +1,17 @@
+from datetime import date
+from typing import Callable
+
 import dash
 from dash import Input, Output, callback, dash_table, dcc, html
 from dash.dash_table.Format import Format
 
-from covid19_dash.data import load_latest_day_data
+from covid19_dash.data import TODAY, load_full_latest_day_data, single_flight
 
 dash.register_page(__name__, title="Raw Values")
 
-data = load_latest_day_data().copy()
-dates = data.pop("Last Updated Date")
-
-DATA_INTRO_TEXT = f"""
+DATA_INTRO_TEXT = """
 The table below displays COVID-19 case information accross
-{data['Location'].nunique()} countries as at *{dates[0].strftime('%c')}* UTC.
+{n_countries} countries as at *{date}* UTC.
 
 The data used here is obtained from the **Our World in Data**
 [owid / covid-19-data][1] GitHub repository.
@@ -19,11 +19,27 @@ The data used here is obtained from the **Our World in Data**
 [1]: https://github.com/owid/covid-19-data
 """
 
-layout = html.Div(
-    [
-        html.H1("Table of Values"),
+
+@single_flight(maxsize=1)
+def data_table(date: date = TODAY) -> list:
+    """Get the introductory text and table of every latest-day column. The
+    full-width data is only loaded once this page is first visited.
+
+    Args:
+        date (date): The current date.
+
+    Returns:
+        list: Page components.
+    """
+    data = load_full_latest_day_data(date).copy()
+    dates = data.pop("Last Updated Date")
+    intro_text = DATA_INTRO_TEXT.format(
+        n_countries=data["Location"].nunique(),
+        date=dates[0].strftime("%c"),
+    )
+    return [
         # Introductory text
-        dcc.Markdown(DATA_INTRO_TEXT, className="data-description"),
+        dcc.Markdown(intro_text, className="data-description"),
         # Data table
         html.Div(
             className="raw-data-table",
@@ -77,52 +93,78 @@ layout = html.Div(
                 )
             ],
         ),
-        # Data download button
-        html.Div(
-            style={"margin": "5%"},
-            children=[
-                html.Button(
-                    "Download data",
-                    id="download-button",
-                    className="custom-button",
-                ),
-                dcc.Download(
-                    id="download-dataset", type="application/vnd.ms-excel"
-                ),
-            ],
-        ),
-        html.Div(
-            className="page-link",
-            children=[
-                dcc.Link(
-                    "Compare Countries",
-                    href="/compare-countries",
-                    refresh=True,
-                ),
-                dcc.Link("Global Dashboard", href="/", refresh=True),
-            ],
-        ),
     ]
-)
+
+
+def layout(**query_parameters) -> html.Div:
+    """Get the Raw Values page.
+
+    Args:
+        query_parameters: The page URL's query parameters (unused).
+
+    Returns:
+        html.Div: The page.
+    """
+    return html.Div(
+        [
+            html.H1("Table of Values"),
+            *data_table(),
+            # Data download button
+            html.Div(
+                style={"margin": "5%"},
+                children=[
+                    html.Button(
+                        "Download data",
+                        id="download-button",
+                        className="custom-button",
+                    ),
+                    html.Div(id="download-progress"),
+                    dcc.Download(
+                        id="download-dataset", type="application/vnd.ms-excel"
+                    ),
+                ],
+            ),
+            html.Div(
+                className="page-link",
+                children=[
+                    dcc.Link(
+                        "Compare Countries",
+                        href="/compare-countries",
+                        refresh=True,
+                    ),
+                    dcc.Link("Global Dashboard", href="/", refresh=True),
+                ],
+            ),
+        ]
+    )
 
 
 @callback(
     Output("download-dataset", "data"),
     Input("download-button", "n_clicks"),
+    background=True,
+    progress=Output("download-progress", "children"),
+    progress_default="",
+    running=[(Output("download-button", "disabled"), True, False)],
+    # The file only depends on the data, not on the number of clicks
+    cache_args_to_ignore=[0],
     prevent_initial_call=True,
 )
-def download_global_dataset(n_clicks: int) -> dict:
+def download_global_dataset(set_progress: Callable, n_clicks: int) -> dict:
     """Prepare an excel file for download whenever a user clicks on the
-    download button.
+    download button. Runs in a background worker process.
 
     Args:
+        set_progress (Callable): Reports progress to the user.
         n_clicks (int): Number of times the download button is clicked.
 
     Returns:
         dict: Global COVID-19 data in excel format (base64 encoded), and
             meta-data used by the Download component.
     """
-    data = load_latest_day_data()
+    set_progress("Loading data...")
+    data = load_full_latest_day_data()
+    set_progress("Creating excel file...")
     return dcc.send_data_frame(
         data.to_excel, "covid19-global.xlsx", index=False
     )
@@ -1,6 +1,13 @@
+import base64
+
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from pandas import DataFrame, Series
+from pandas import DataFrame, Series, to_datetime
+from pandas.api.types import infer_dtype
+
+# Integer types plotly.js can decode, smallest first
+TYPED_ARRAY_INTS = ["i1", "u1", "i2", "u2", "i4", "u4"]
 
 
 def plot_value(
@@ -166,9 +173,10 @@ def plot_global_map(data: DataFrame, category: str, date: str) -> go.Figure:
 
     fig = px.choropleth(
         data,
-        locations="Location",
-        locationmode="country names",
+        locations="Iso Code",
+        locationmode="ISO-3",
         color=category,
+        hover_name="Location",
         color_continuous_scale=colors,
         title=f"<i>{category}</i> as at {date}",
     )
@@ -180,7 +188,9 @@ def plot_global_map(data: DataFrame, category: str, date: str) -> go.Figure:
         dragmode=False,
     )
     fig.update_traces(
-        hovertemplate=(f"<b>%{{location}}</b><br>{category}: <b>%{{z:,}}</b>"),
+        hovertemplate=(
+            f"<b>%{{hovertext}}</b><br>{category}: <b>%{{z:,}}</b>"
+        ),
         marker_line_color="#777",
         marker_line_width=0.5,
     )
@@ -266,3 +276,66 @@ def plot_lines(data: DataFrame, category: str) -> go.Figure:
     fig.update_xaxes(fixedrange=True, showgrid=False)
     fig.update_yaxes(fixedrange=True, gridcolor="#444")
     return fig
+
+
+def to_typed_arrays(fig: go.Figure) -> dict:
+    """Get a figure as a dict, with its numeric and date arrays as base64
+    encoded typed arrays, which plotly.js reads without parsing any numbers.
+
+    Integers are stored in the smallest type that fits them, and dates as
+    milliseconds since the epoch on an axis of type "date".
+
+    Args:
+        fig (plotly.graph_objs._figure.Figure): Figure to encode.
+
+    Returns:
+        dict: The figure's data and layout.
+    """
+    figure = fig.to_plotly_json()
+    layout = dict(figure["layout"])
+    data = []
+    for trace in figure["data"]:
+        trace = dict(trace)
+        for key, values in trace.items():
+            if not isinstance(values, np.ndarray):
+                continue
+            if key in {"x", "y"} and infer_dtype(values) in {
+                "datetime",
+                "datetime64",
+            }:
+                values = to_datetime(values).to_numpy()
+                # Numbers are only plotted as dates on date axes
+                axis = f"{key}axis{trace.get(f'{key}axis', key)[1:]}"
+                layout[axis] = {**layout.get(axis, {}), "type": "date"}
+            trace[key] = _typed_array(values)
+        data.append(trace)
+    return {"data": data, "layout": layout}
+
+
+def _typed_array(values: np.ndarray) -> dict | np.ndarray:
+    """Encode a numeric or datetime array as a plotly.js typed array spec, or
+    get other arrays unchanged."""
+    if values.dtype.kind == "M":
+        missing = np.isnat(values)
+        values = values.astype("datetime64[ms]").astype(float)
+        values[missing] = np.nan
+    elif values.dtype.kind not in "iuf":
+        return values
+
+    # Whole numbers, including counts stored as floats, fit smaller types
+    if values.size and (
+        values.dtype.kind in "iu"
+        or (np.isfinite(values).all() and (values % 1 == 0).all())
+    ):
+        low, high = values.min(), values.max()
+        for dtype in TYPED_ARRAY_INTS:
+            if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+                values = values.astype(dtype)
+                break
+    if values.dtype.itemsize == 8 and values.dtype.kind in "iu":
+        values = values.astype(float)  # plotly.js has no 64-bit integers
+    values = values.astype(values.dtype.newbyteorder("<"))
+    return {
+        "dtype": values.dtype.str[1:],
+        "bdata": base64.b64encode(values.tobytes()).decode(),
+    }
@@ -0,0 +1,49 @@
+"""Sign tokens that enable profiling of selected callback requests.
+
+Run this as a script, rather than with `python -m`, so that the dashboard is
+not loaded just to print a token. Only the standard library is used.
+
+Examples:
+    PROFILE_SECRET=... python covid19_dash/profile_token.py --minutes 10
+"""
+
+import argparse
+import hmac
+import os
+import time
+
+
+def profile_token(expires: int, secret: str) -> str:
+    """Get a token that enables profiling until `expires`.
+
+    Args:
+        expires (int): Expiry time, in seconds since the epoch.
+        secret (str): The server's `PROFILE_SECRET`.
+
+    Returns:
+        str: The expiry time and its signature.
+    """
+    signature = hmac.new(secret.encode(), str(expires).encode(), "sha256")
+    return f"{expires}.{signature.hexdigest()}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Print a token that enables profiling of callback "
+        "requests, signed with the PROFILE_SECRET environment variable."
+    )
+    parser.add_argument(
+        "--minutes",
+        type=int,
+        default=10,
+        help="Minutes until the token expires.",
+    )
+    args = parser.parse_args()
+    secret = os.environ.get("PROFILE_SECRET")
+    if not secret:
+        parser.error("PROFILE_SECRET is not set")
+    print(profile_token(int(time.time()) + args.minutes * 60, secret))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Opt-in profiling of Dash callback requests.
+
+Set `PROFILE_CALLBACKS=1` to profile every callback request, or set
+`PROFILE_SECRET` and send a signed token, printed by
+`covid19_dash/profile_token.py`, in an `X-Profile-Token` header or
+`profile_token` query parameter to profile selected requests only. Profiles
+are written to `PROFILE_DIR` in cProfile's format, e.g. for `python -m pstats`
+or snakeviz, and the slowest functions are logged.
+"""
+
+import cProfile
+import hmac
+import logging
+import os
+import pstats
+import re
+import tempfile
+import time
+import uuid
+from functools import wraps
+from pathlib import Path
+
+from flask import Flask, request
+
+from covid19_dash.profile_token import profile_token
+
+PROFILE_CALLBACKS = os.environ.get("PROFILE_CALLBACKS") == "1"
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET")
+PROFILE_DIR = Path(
+    os.environ.get(
+        "PROFILE_DIR",
+        os.path.join(tempfile.gettempdir(), "covid19-dash-profiles"),
+    )
+)
+CALLBACK_URL = "/_dash-update-component"
+TOKEN_HEADER = "X-Profile-Token"
+TOKEN_PARAMETER = "profile_token"
+# Number of functions to log, by time spent in the function itself
+SLOWEST_FRAMES = 10
+
+logger = logging.getLogger(__name__)
+
+
+def valid_token(token: str | None, secret: str) -> bool:
+    """Check that `token` was signed with `secret` and has not expired.
+
+    Args:
+        token (str | None): Token sent with the request.
+        secret (str): The server's `PROFILE_SECRET`.
+
+    Returns:
+        bool: Whether the token is valid.
+    """
+    expires, _, _ = (token or "").partition(".")
+    # str.isdigit also accepts digits that int() does not, e.g. "²"
+    if not (expires.isascii() and expires.isdigit()):
+        return False
+    if int(expires) < time.time():
+        return False
+    # Compared as bytes: compare_digest rejects non-ASCII strings
+    return hmac.compare_digest(
+        token.encode(), profile_token(int(expires), secret).encode()
+    )
+
+
+def slowest_frames(
+    profiler: cProfile.Profile, n: int = SLOWEST_FRAMES
+) -> list[str]:
+    """Describe the functions with the most time spent in them.
+
+    Args:
+        profiler (cProfile.Profile): A finished profile.
+        n (int, optional): Number of functions. Defaults to `SLOWEST_FRAMES`.
+
+    Returns:
+        list[str]: Own and cumulative time, calls and location of each
+            function, slowest first.
+    """
+    stats = pstats.Stats(profiler).stats
+    slowest = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+    frames = []
+    for (filename, line, function), (_, calls, own, total, _) in slowest[:n]:
+        frames.append(
+            f"{own * 1e3:9.1f} ms {total * 1e3:9.1f} ms {calls:7d}  "
+            f"{function} ({Path(filename).name}:{line})"
+        )
+    return frames
+
+
+def init_profiling(
+    server: Flask,
+    always: bool = PROFILE_CALLBACKS,
+    secret: str | None = PROFILE_SECRET,
+    directory: Path = PROFILE_DIR,
+) -> None:
+    """Profile Dash callback requests on `server`, if enabled.
+
+    When neither `always` nor `secret` is set, the server is left as is.
+
+    Args:
+        server (flask.Flask): The Dash app's server.
+        always (bool, optional): Profile every callback request. Defaults to
+            `PROFILE_CALLBACKS`.
+        secret (str | None, optional): Key that profiling tokens are signed
+            with. Defaults to `PROFILE_SECRET`.
+        directory (Path, optional): Where to write profiles. Defaults to
+            `PROFILE_DIR`.
+    """
+    if not (always or secret):
+        return
+
+    endpoint = next(
+        rule.endpoint
+        for rule in server.url_map.iter_rules()
+        if rule.rule.endswith(CALLBACK_URL)
+    )
+    view = server.view_functions[endpoint]
+
+    @wraps(view)
+    def profiled_view(*args, **kwargs):
+        token = request.headers.get(TOKEN_HEADER) or request.args.get(
+            TOKEN_PARAMETER
+        )
+        if not (always or valid_token(token, secret)):
+            return view(*args, **kwargs)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        response = profiler.runcall(view, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        output = (request.get_json(silent=True) or {}).get("output", "")
+        name = re.sub(r"[^\w-]+", "-", output).strip("-")[:80]
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}-{name}"
+            ".prof"
+        )
+        profiler.dump_stats(path)
+        logger.warning(
+            "Profiled %s in %.0f ms, saved to %s. Slowest functions "
+            "(own time, total time, calls):\n%s",
+            output,
+            elapsed * 1e3,
+            path,
+            "\n".join(slowest_frames(profiler)),
+        )
+        return response
+
+    server.view_functions[endpoint] = profiled_view
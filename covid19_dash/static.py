@@ -0,0 +1,117 @@
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from flask import (
+    Flask,
+    Response,
+    abort,
+    current_app,
+    has_app_context,
+    request,
+    send_from_directory,
+)
+
+ASSETS_DIR = Path(__file__).parent / "assets"
+STATIC_URL_PATH = "/static-assets"
+# Fingerprinted files never change, so browsers need not revalidate them
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def hash_assets() -> dict[str, str]:
+    """Compute short fingerprints of the content of every asset.
+
+    Returns:
+        dict[str, str]: The first 12 hex digits of each file's SHA-256 hash,
+            keyed by the file's path relative to the assets folder.
+    """
+    fingerprints = {}
+    for path in ASSETS_DIR.rglob("*"):
+        if path.is_file():
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            fingerprints[path.relative_to(ASSETS_DIR).as_posix()] = digest[:12]
+    return fingerprints
+
+
+_cached_fingerprints = lru_cache(maxsize=1)(hash_assets)
+
+
+def asset_fingerprints() -> dict[str, str]:
+    """Get short fingerprints of the content of every asset.
+
+    Fingerprints are computed once, except in debug mode, where assets are
+    edited while the server runs.
+
+    Returns:
+        dict[str, str]: Fingerprints, as from `hash_assets`.
+    """
+    if has_app_context() and current_app.debug:
+        return hash_assets()
+    return _cached_fingerprints()
+
+
+def asset_url(filename: str) -> str:
+    """Get the fingerprinted URL of an asset.
+
+    Args:
+        filename (str): File name, relative to the assets folder.
+
+    Returns:
+        str: URL that changes whenever the file's content changes.
+    """
+    return f"{STATIC_URL_PATH}/{asset_fingerprints()[filename]}/{filename}"
+
+
+def stylesheet_links() -> str:
+    """Link every stylesheet in the assets folder, by fingerprinted URL.
+
+    Returns:
+        str: A `<link>` tag for each ".css" asset, in name order.
+    """
+    return "\n".join(
+        f'<link rel="stylesheet" href="{asset_url(filename)}">'
+        for filename in sorted(asset_fingerprints())
+        if filename.endswith(".css")
+    )
+
+
+def serve_asset(fingerprint: str, filename: str) -> Response:
+    """Serve an asset with long-lived, immutable cache headers.
+
+    Args:
+        fingerprint (str): Content hash in the requested URL.
+        filename (str): File name, relative to the assets folder.
+
+    Returns:
+        flask.Response: The asset, or a 404 response if the fingerprint is
+            stale.
+    """
+    if asset_fingerprints().get(filename) != fingerprint:
+        abort(404)
+    response = send_from_directory(ASSETS_DIR, filename)
+    response.headers["Cache-Control"] = IMMUTABLE
+    return response
+
+
+def add_immutable_header(response: Response) -> Response:
+    """Mark Dash's fingerprinted component bundles as immutable too."""
+    if (
+        request.path.startswith("/_dash-component-suites/")
+        and response.cache_control.max_age == 31536000
+    ):
+        response.headers["Cache-Control"] = IMMUTABLE
+    return response
+
+
+def init_static_assets(server: Flask) -> None:
+    """Serve fingerprinted assets from `server`.
+
+    Args:
+        server (flask.Flask): The Dash app's server.
+    """
+    server.add_url_rule(
+        f"{STATIC_URL_PATH}/<fingerprint>/<path:filename>",
+        "fingerprinted_asset",
+        serve_asset,
+    )
+    server.after_request(add_immutable_header)
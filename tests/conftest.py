@@ -1,10 +1,22 @@
+import os
+import tempfile
 from shutil import rmtree
 
 import pytest
 
+# Keep background callback results apart from those of a running dashboard
+CALLBACK_CACHE_DIR = tempfile.mkdtemp(prefix="covid19-dash-callbacks-")
+os.environ["CALLBACK_CACHE_DIR"] = CALLBACK_CACHE_DIR
+
 
 @pytest.fixture(scope="session")
 def temp_data_dir(tmp_path_factory):
     temp_dir = tmp_path_factory.mktemp("test_data")
     yield temp_dir
     rmtree(temp_dir)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def callback_cache_dir():
+    yield CALLBACK_CACHE_DIR
+    rmtree(CALLBACK_CACHE_DIR)
@@ -0,0 +1,123 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+
+from covid19_dash import server
+from covid19_dash.admission import STATS_URL, Gate, init_admission_control
+from covid19_dash.jobs import background_callback_manager
+from covid19_dash.loadtest import InProcessClient, callback_request
+
+
+def test_gate():
+    gate = Gate(concurrency=1, queue_size=1, max_wait=5)
+    assert gate.acquire() is not None
+
+    # The next request waits for a slot, and the one after is turned away
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        waiting = pool.submit(gate.acquire)
+        while gate.queued == 0:
+            time.sleep(0.01)
+        assert gate.acquire() is None
+        assert gate.stats()["queue_depth"] == 1
+
+        gate.release(0.2)
+        assert waiting.result() > 0
+
+    stats = gate.stats()
+    assert (stats["admitted"], stats["rejected"], stats["active"]) == (2, 1, 1)
+    assert gate.retry_after() >= 1
+
+
+def test_gate_max_wait():
+    gate = Gate(concurrency=1, queue_size=1, max_wait=0.05)
+    gate.acquire()
+
+    start = time.perf_counter()
+    assert gate.acquire() is None
+    assert time.perf_counter() - start < 1
+    assert gate.stats()["queue_depth"] == 0
+
+
+def test_overload():
+    app = Flask(__name__)
+    release = threading.Event()
+
+    @app.post("/_dash-update-component")
+    def dispatch():
+        release.wait(5)
+        return "{}"
+
+    gates = init_admission_control(
+        app,
+        {
+            "cheap": Gate(concurrency=1, queue_size=1, max_wait=5),
+            "expensive": Gate(concurrency=1, queue_size=0, max_wait=5),
+        },
+    )
+    client = app.test_client()
+    body = {"output": "line-plot.figure"}
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        running = pool.submit(
+            client.post, "/_dash-update-component", json=body
+        )
+        while gates["expensive"].active == 0:
+            time.sleep(0.01)
+
+        # Requests beyond the queue are turned away at once
+        rejected = client.post("/_dash-update-component", json=body)
+        assert rejected.status_code == 503
+        assert int(rejected.headers["Retry-After"]) >= 1
+        release.set()
+        assert running.result().status_code == 200
+
+    response = client.post("/_dash-update-component", json={"output": "x.y"})
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("queue;dur=")
+
+    stats = client.get(STATS_URL).get_json()
+    assert stats["expensive"]["rejected"] == 1
+    assert stats["expensive"]["admitted"] == 1
+    assert stats["cheap"]["admitted"] == 1
+
+
+def test_background_backlog(monkeypatch):
+    monkeypatch.setattr(background_callback_manager, "max_jobs", 0)
+    rejected = background_callback_manager.rejected
+
+    # Jobs beyond the workers' backlog are turned away before they queue
+    status, _ = InProcessClient().send(
+        callback_request(
+            "download_global_dataset",
+            [("download-dataset", "data")],
+            {"download-button.n_clicks": 1000},
+        )
+    )
+    assert status == 503
+
+    stats = server.test_client().get(STATS_URL).get_json()["background"]
+    assert stats["rejected"] == rejected + 1
+    assert stats["backlog"] == 0
+
+
+def test_admission_stats():
+    status, _ = InProcessClient().send(
+        callback_request(
+            "show_leaderboard",
+            [("leaderboard", "children")],
+            {
+                "column-selector.value": "Total Cases",
+                "leaderboard-order.value": "top",
+                "leaderboard-size.value": 5,
+                "leaderboard-continent.value": None,
+            },
+        )
+    )
+    assert status == 200
+
+    stats = server.test_client().get(STATS_URL).get_json()
+    assert set(stats) == {"cheap", "expensive", "background"}
+    assert stats["cheap"]["admitted"] >= 1
+    assert {"queue_depth", "wait_p50_ms", "wait_p95_ms"} <= set(stats["cheap"])
@@ -0,0 +1,83 @@
+from covid19_dash import server
+from covid19_dash.indexes import load_latest_day_table
+
+
+def test_time_series():
+    client = server.test_client()
+    response = client.get(
+        "/api/v1/time-series?countries=KEN,UGA&columns=Date,Iso Code,Deaths"
+        "&start=2021-01-01&end=2021-12-31"
+    )
+
+    assert response.status_code == 200
+    data = response.get_json()
+    columns = data["columns"]
+    assert list(columns) == ["Date", "Iso Code", "Deaths"]
+    assert data["rows"] == len(columns["Date"]) > 0
+    assert set(columns["Iso Code"]) == {"KEN", "UGA"}
+    assert min(columns["Date"]) >= "2021-01-01"
+    assert max(columns["Date"]) <= "2021-12-31"
+
+
+def test_latest():
+    client = server.test_client()
+    response = client.get(
+        "/api/v1/latest?countries=uga,KEN&columns=Location,Total Cases"
+    )
+
+    assert response.status_code == 200
+    columns = response.get_json()["columns"]
+    assert columns["Location"] == ["Uganda", "Kenya"]
+    assert all(isinstance(value, float) for value in columns["Total Cases"])
+
+    # Missing values are null, and every country is included by default
+    data = client.get("/api/v1/latest").get_json()
+    assert data["rows"] == load_latest_day_table().n_rows
+    assert None in data["columns"]["Icu Patients"]
+
+
+def test_daily_differences():
+    response = server.test_client().get("/api/v1/daily-differences")
+
+    assert response.status_code == 200
+    columns = response.get_json()["columns"]
+    assert list(columns) == ["Date", "Confirmed", "Deaths"]
+    assert len(columns["Date"]) == 30
+
+
+def test_etag():
+    client = server.test_client()
+    url = "/api/v1/latest?columns=Location"
+    response = client.get(url)
+    etag = response.headers["ETag"]
+
+    assert load_latest_day_table().version in etag
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+    # Different projections have different ETags
+    other = client.get(
+        "/api/v1/latest?columns=Continent", headers={"If-None-Match": etag}
+    )
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+
+
+def test_invalid_parameters():
+    client = server.test_client()
+
+    for url, message in [
+        ("/api/v1/latest?columns=Location,Nope", "Unknown columns: Nope"),
+        ("/api/v1/time-series?countries=KEN,XYZ", "Unknown countries: XYZ"),
+        ("/api/v1/time-series?start=yesterday", "Invalid start date"),
+    ]:
+        response = client.get(url)
+        assert response.status_code == 400
+        assert message in response.get_json()["error"]
+
+    # Empty lists are the same as leaving the parameter out
+    for path in ["latest", "time-series"]:
+        everything = client.get(f"/api/v1/{path}").get_json()
+        response = client.get(f"/api/v1/{path}?countries=,,&columns=,")
+        assert response.status_code == 200
+        assert response.get_json() == everything
@@ -0,0 +1,41 @@
+from pandas import DataFrame
+
+from covid19_dash.countries import CountryRegistry, load_country_registry
+from covid19_dash.data import match_jhu_countries
+
+LOCATIONS = DataFrame(
+    {
+        "Iso Code": ["KEN", "USA", "CPV"],
+        "Location": ["Kenya", "United States", "Cape Verde"],
+    }
+)
+
+
+def test_country_registry():
+    registry = CountryRegistry.from_frame(LOCATIONS)
+
+    assert len(registry) == 3
+    # Ids are positions in the sorted ISO-3 codes
+    assert registry.ids(["CPV", "KEN", "USA", "XXX"]).tolist() == [0, 1, 2, -1]
+    # Options are selected by ISO-3 code, and unknown ids are left out
+    assert registry.options([2, 0, -1]) == [
+        {"label": "Cape Verde", "value": "CPV"},
+        {"label": "United States", "value": "USA"},
+    ]
+
+
+def test_load_country_registry():
+    registry = load_country_registry()
+
+    assert isinstance(registry, CountryRegistry)
+    assert registry.names[registry.ids(["KEN"])[0]] == "Kenya"
+
+
+def test_match_jhu_countries():
+    matches = match_jhu_countries(
+        ["Kenya", "US", "Cabo Verde", "Diamond Princess"], LOCATIONS
+    )
+
+    assert matches["Iso Code"].to_list()[:3] == ["KEN", "USA", "CPV"]
+    assert matches.loc["US", "Location"] == "United States"
+    assert matches.loc["Diamond Princess"].isna().all()
@@ -1,9 +1,16 @@
+from datetime import date
+
 from pandas import DataFrame, DatetimeIndex
 from pandas.api.types import is_datetime64_dtype
 
 from covid19_dash.data import (
+    LATEST_DAY_COLUMNS,
+    latest_day_columns,
     load_30_day_diff,
+    load_full_latest_day_data,
     load_latest_day_data,
+    load_snapshot,
+    load_snapshot_dates,
     load_time_series_data,
 )
 
@@ -24,6 +31,7 @@ def test_load_time_Series_data():
     assert ts_data.columns.to_list() == [
         "Date",
         "Country/Region",
+        "Iso Code",
         "Confirmed",
         "Deaths",
     ]
@@ -52,3 +60,26 @@ def test_load_latest_day_data():
     cols_set = set(latest_day_data.columns)
     for col in necessary_cols:
         assert col in cols_set
+
+    # Only the columns in use are loaded
+    assert cols_set == set(latest_day_columns())
+    for columns in LATEST_DAY_COLUMNS.values():
+        assert set(columns) <= cols_set
+
+
+def test_load_full_latest_day_data():
+    full_data = load_full_latest_day_data()
+
+    assert set(latest_day_columns()) < set(full_data.columns)
+    assert len(full_data) == len(load_latest_day_data())
+
+
+def test_load_snapshots():
+    snapshot_dates = load_snapshot_dates()
+    assert all(isinstance(day, date) for day in snapshot_dates)
+    assert snapshot_dates == sorted(snapshot_dates)
+
+    snapshot = load_snapshot(snapshot_dates[-1])
+    assert isinstance(snapshot, DataFrame)
+    assert snapshot["Last Updated Date"].max().date() == snapshot_dates[-1]
+    assert set(snapshot.columns) == set(latest_day_columns())
@@ -1,7 +1,8 @@
-from pandas import MultiIndex, Series
+from pandas import DataFrame, MultiIndex, Series, read_csv
 
 from covid19_dash import data as data_module
 from covid19_dash.data import (
+    append_snapshot,
     fetch_jhu_data,
     fetch_latest_data,
     fetch_time_series_data,
@@ -29,18 +30,37 @@ def test_fetch_latest_owid_data(monkeypatch, temp_data_dir, capsys):
     assert expected_file.is_file()
 
 
-def test_fetch_time_series_data(monkeypatch, temp_data_dir, capsys):
+def test_append_snapshot(monkeypatch, tmp_path):
     # Overwrite default data location
-    monkeypatch.setattr(data_module, "DATA_DIR", temp_data_dir)
+    monkeypatch.setattr(data_module, "DATA_DIR", tmp_path)
+
+    first_day = DataFrame({"Last Updated Date": ["2023-04-25"], "Value": [1]})
+    append_snapshot(first_day)
+    append_snapshot(first_day.assign(Value=2))  # Snapshots are not replaced
+    append_snapshot(DataFrame({"Last Updated Date": ["2023-04-26"]}))
+
+    snapshot_dir = tmp_path / "snapshots"
+    assert read_csv(snapshot_dir / "2023-04-25.csv.gz")["Value"][0] == 1
+    assert read_csv(snapshot_dir / "dates.csv")["Date"].to_list() == [
+        "2023-04-25",
+        "2023-04-26",
+    ]
+
+
+def test_fetch_time_series_data(monkeypatch, tmp_path, capsys):
+    # Overwrite default data location
+    monkeypatch.setattr(data_module, "DATA_DIR", tmp_path)
+    # Country names are matched against the latest OWID data
+    DataFrame(
+        {"Iso Code": ["KEN", "UGA"], "Location": ["Kenya", "Uganda"]}
+    ).to_csv(tmp_path / "latest-data.csv", index=False)
 
-    expected_daily_diff = temp_data_dir / "daily-differences.csv"
-    expected_ts = temp_data_dir / "time-series-data.csv"
-    # Make sure files don't already exists
-    expected_daily_diff.unlink(missing_ok=True)
-    expected_ts.unlink(missing_ok=True)
+    expected_daily_diff = tmp_path / "daily-differences.csv"
+    expected_ts = tmp_path / "time-series-data.csv"
 
     fetch_time_series_data()
     captured = capsys.readouterr()
     assert "Fetching time series info..." in captured.out
     assert expected_daily_diff.is_file()
-    assert expected_ts.is_file()
\ No newline at end of file
+    assert expected_ts.is_file()
+    assert set(read_csv(expected_ts)["Iso Code"]) == {"KEN", "UGA"}
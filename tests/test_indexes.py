@@ -0,0 +1,116 @@
+import numpy as np
+from pandas import DataFrame, to_datetime
+
+from covid19_dash.countries import CountryRegistry, load_country_registry
+from covid19_dash.indexes import (
+    MetricRankings,
+    SimilarCurves,
+    TimeSeriesIndex,
+    load_metric_rankings,
+    load_similar_curves,
+    load_time_series_index,
+)
+
+REGISTRY = CountryRegistry(["KEN", "UGA"], ["Kenya", "Uganda"])
+TIME_SERIES = DataFrame(
+    {
+        "Date": to_datetime(
+            ["2021-01-10", "2021-01-03", "2021-01-17", "2021-01-03"]
+        ),
+        "Country/Region": ["Uganda", "Kenya", "Kenya", "Uganda"],
+        "Iso Code": ["UGA", "KEN", "KEN", "UGA"],
+        "Confirmed": [4, 1, 2, 3],
+    }
+)
+
+
+def test_time_series_index():
+    index = TimeSeriesIndex(TIME_SERIES, REGISTRY)
+
+    assert index.start_date == to_datetime("2021-01-03")
+    assert index.end_date == to_datetime("2021-01-17")
+    # Sorted by country, then date
+    assert index.select([0, 1])["Confirmed"].to_list() == [1, 2, 3, 4]
+    assert index.select([1], start="2021-01-04")["Confirmed"].to_list() == [4]
+    first_week = index.select([0, 1], end="2021-01-03")
+    assert first_week["Confirmed"].to_list() == [1, 3]
+    assert index.select([-1, 5]).empty
+
+
+def test_load_time_series_index():
+    index = load_time_series_index()
+
+    assert isinstance(index, TimeSeriesIndex)
+    assert index.select([], "2021-01-01", "2021-12-31").empty
+    assert not index.select(index.data["Country Id"][:1]).empty
+
+
+def test_metric_rankings():
+    latest = DataFrame(
+        {
+            "Location": ["Kenya", "Uganda", "France", "Spain"],
+            "Continent": ["Africa", "Africa", "Europe", "Europe"],
+            "Total Cases": [3.0, None, 4.0, 1.0],
+        }
+    )
+    rankings = MetricRankings(latest, ["Total Cases"])
+
+    top = rankings.rank("Total Cases", 2)
+    assert top["Location"].to_list() == ["France", "Kenya"]
+    bottom = rankings.rank("Total Cases", 10, bottom=True)
+    # Countries without values are not ranked
+    assert bottom["Location"].to_list() == ["Spain", "Kenya", "France"]
+    africa = rankings.rank("Total Cases", 10, continent="Africa")
+    assert africa["Location"].to_list() == ["Kenya"]
+    assert rankings.continents == ["Africa", "Europe"]
+    assert rankings.rank("Total Cases", 10, continent="Oceania").empty
+
+
+def test_load_metric_rankings():
+    rankings = load_metric_rankings()
+
+    assert isinstance(rankings, MetricRankings)
+    assert len(rankings.rank("Total Cases", 5, continent="Asia")) == 5
+
+
+def test_similar_curves():
+    registry = CountryRegistry(
+        ["AAA", "BBB", "CCC", "DDD", "EEE"], ["A", "B", "C", "D", "E"]
+    )
+    dates = to_datetime(["2021-01-03", "2021-01-10", "2021-01-17"])
+    curves = {
+        "AAA": [10, 20, 40],
+        "BBB": [100, 200, 400],  # Same curve as AAA, per capita
+        "CCC": [10, 10, 10],
+        "DDD": [50, 150, 350],
+        "EEE": [10, 20, 40],  # Unknown population
+    }
+    data = DataFrame(
+        {
+            "Date": np.tile(dates, len(curves)),
+            "Iso Code": np.repeat(list(curves), len(dates)),
+            "Deaths": np.concatenate(list(curves.values())),
+        }
+    )
+    population = np.array([1e5, 1e6, 1e5, 1e6, np.nan])
+    similar = SimilarCurves(
+        TimeSeriesIndex(data, registry), population, ["Deaths"]
+    )
+
+    assert similar.nearest(0, "Deaths", k=1).tolist() == [1]
+    assert similar.nearest(1, "Deaths", k=3).tolist() == [0, 3, 2]
+    # Countries without a population are not indexed, nor returned
+    assert similar.nearest(4, "Deaths", k=3).size == 0
+    assert 4 not in similar.nearest(0, "Deaths", k=10)
+    # Unknown ids do not wrap around
+    assert similar.nearest(-1, "Deaths", k=3).size == 0
+    assert similar.nearest(5, "Deaths", k=3).size == 0
+
+
+def test_load_similar_curves():
+    similar = load_similar_curves()
+    kenya = load_country_registry().ids(["KEN"])[0]
+    nearest = similar.nearest(kenya, "Confirmed", k=5)
+
+    assert len(nearest) == 5
+    assert kenya not in nearest
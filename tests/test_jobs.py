@@ -0,0 +1,118 @@
+import json
+import os
+import signal
+import time
+
+import diskcache
+import pytest
+
+from covid19_dash.data import load_full_latest_day_data
+from covid19_dash.indexes import load_latest_day_table
+from covid19_dash.jobs import (
+    JobBacklogFull,
+    ProcessPoolManager,
+    background_callback_manager,
+)
+from covid19_dash.loadtest import (
+    InProcessClient,
+    callback_request,
+    poll_background_job,
+)
+
+
+@pytest.fixture
+def callback_manager():
+    # Start without stored results, and leave no jobs running afterwards
+    background_callback_manager.handle.clear()
+    yield background_callback_manager
+    background_callback_manager.shutdown()
+    background_callback_manager.start()
+
+
+def test_background_download(callback_manager):
+    client = InProcessClient()
+    request = callback_request(
+        "download_global_dataset",
+        [("download-dataset", "data")],
+        {"download-button.n_clicks": 1},
+    )
+
+    # The request thread gets a job id instead of waiting for the file
+    status, content = client.send(request)
+    job = json.loads(content)
+    assert status == 200
+    assert {"cacheKey", "job"} <= set(job)
+
+    status, content = poll_background_job(client, request, job)
+    result = json.loads(content)["response"]["download-dataset"]["data"]
+    assert status == 200
+    assert result["filename"] == "covid19-global.xlsx"
+
+    # Later downloads reuse the stored file
+    _, content = client.send(request)
+    job = json.loads(content)
+    assert not callback_manager.job_running(job["job"])
+    assert callback_manager.result_ready(job["cacheKey"])
+
+
+def test_errors_are_not_reused(tmp_path):
+    manager = ProcessPoolManager(
+        diskcache.Cache(tmp_path), processes=1, cache_by=[lambda: "v1"]
+    )
+    manager.handle.set("map", {"figure": {}})
+    manager.call_job_fn("map", None, [], {})
+    assert manager._pool is None  # The stored result is reused
+
+    error = {"long_callback_error": {"msg": "Download failed", "tb": ""}}
+    manager.handle.set("download", error)
+    assert manager.get_result("download", None) == error
+    assert not manager.result_ready("download")
+
+
+def crash(*_) -> None:
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def test_lost_jobs_time_out(tmp_path, monkeypatch):
+    # Workers look up jobs in the app's registry
+    monkeypatch.setitem(
+        background_callback_manager.func_registry, "crash", crash
+    )
+    manager = ProcessPoolManager(
+        diskcache.Cache(tmp_path), processes=1, max_jobs=1, job_timeout=0.5
+    )
+    manager.func_registry["crash"] = crash
+    manager.start()
+    try:
+        job = manager.call_job_fn("crash", crash, [], {})
+        with pytest.raises(JobBacklogFull):
+            manager.call_job_fn("crash", crash, [], {})
+
+        # The killed worker never reports back, so the job is let go
+        time.sleep(1)
+        assert not manager.job_running(job)
+        assert manager.stats()["backlog"] == 0
+        assert manager.stats()["lost"] == 1
+        manager.call_job_fn("crash", crash, [], {})
+    finally:
+        manager.shutdown()
+
+
+def test_map_does_not_load_full_data(callback_manager):
+    load_full_latest_day_data.cache_clear()
+    load_latest_day_table.cache_clear()
+    client = InProcessClient()
+    request = callback_request(
+        "plot_map",
+        [("global-choropleth-map", "figure")],
+        {"column-selector.value": "Total Cases", "snapshot-date.value": 0},
+    )
+
+    status, _ = poll_background_job(
+        client, request, json.loads(client.send(request)[1])
+    )
+    assert status == 200
+
+    # Result cache keys come from the columns the dashboard uses
+    assert load_full_latest_day_data.cache_info().loads == 0
+    assert load_latest_day_table.cache_info().loads == 0
@@ -0,0 +1,71 @@
+import socket
+
+from covid19_dash.loadtest import (
+    TIMED_OUT,
+    HTTPClient,
+    InProcessClient,
+    Request,
+    figure_payloads,
+    page_weight,
+    poll_background_job,
+    replay_sessions,
+    run,
+)
+
+
+def test_replay_sessions():
+    sessions = list(replay_sessions(n_actions=20, seed=1))
+
+    assert len(sessions) == 20
+    assert sessions == list(replay_sessions(n_actions=20, seed=1))
+    # Each session starts by loading its page
+    assert all(session[0].body is None for session in sessions)
+
+
+def test_run_in_process():
+    summary = run(InProcessClient, concurrency=2, n_actions=6)
+
+    assert "total" in summary.index
+    assert summary["errors"].sum() == 0
+    assert {"req/s", "p50 (ms)", "p95 (ms)", "p99 (ms)"} <= set(summary)
+
+
+def test_timeouts():
+    class PendingClient:
+        def send(self, request: Request) -> tuple[int, bytes]:
+            return 200, b'{"pending": true}'
+
+    # A job that never finishes counts as failed, instead of blocking
+    status, _ = poll_background_job(
+        PendingClient(), Request("job", "/"), {"cacheKey": "", "job": ""}, 0.2
+    )
+    assert status == TIMED_OUT
+
+    # As does a server that never replies
+    with socket.create_server(("127.0.0.1", 0)) as listener:
+        client = HTTPClient(
+            f"http://127.0.0.1:{listener.getsockname()[1]}", timeout=0.2
+        )
+        assert client.send(Request("GET /", "/"))[0] == TIMED_OUT
+
+
+def test_page_weight():
+    weights = page_weight(InProcessClient())
+
+    assert weights.loc["/raw-values", "external files"] == 0
+    # plotly.js is only loaded by pages with graphs
+    assert weights.loc["/raw-values", "KB"] < weights.loc["/", "KB"]
+
+
+def test_figure_payloads():
+    payloads = figure_payloads(repeat=1)
+
+    assert set(payloads.index.get_level_values(0)) == {
+        "plot_lines",
+        "plot_global_map",
+        "plot_column_chart",
+    }
+    assert (payloads["KB"] > 0).all()
+    # Dates and counts take less space as typed arrays
+    lines = payloads.loc["plot_lines", "KB"]
+    assert lines["typed arrays"] < lines["JSON"]
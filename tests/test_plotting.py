@@ -0,0 +1,53 @@
+import base64
+
+import numpy as np
+import pandas as pd
+
+from covid19_dash.plotting import plot_lines, to_typed_arrays
+
+
+def decode(spec: dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(spec["bdata"]), spec["dtype"])
+
+
+def test_to_typed_arrays():
+    data = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2021-01-03", "2021-01-10"] * 2),
+            "Country/Region": ["Kenya", "Kenya", "Uganda", "Uganda"],
+            "Deaths": [10, 300, 5, 70000],
+        }
+    )
+    fig = plot_lines(data, "Deaths")
+    figure = to_typed_arrays(fig)
+
+    kenya, uganda = figure["data"]
+    assert kenya["name"] == "Kenya"
+    # Integers are stored in the smallest type that fits them
+    assert kenya["y"]["dtype"] == "i2"
+    assert uganda["y"]["dtype"] == "i4"
+    assert decode(uganda["y"]).tolist() == [5, 70000]
+    # Dates are milliseconds since the epoch, on a date axis
+    dates = decode(kenya["x"]).astype("datetime64[ms]")
+    assert dates.tolist() == data["Date"].iloc[:2].dt.to_pydatetime().tolist()
+    assert figure["layout"]["xaxis"]["type"] == "date"
+    # The figure itself is unchanged
+    assert isinstance(fig.data[0].y, np.ndarray)
+    assert "type" not in fig.layout.xaxis.to_plotly_json()
+
+
+def test_to_typed_arrays_floats():
+    fig = plot_lines(
+        pd.DataFrame(
+            {
+                "Date": pd.to_datetime(["2021-01-03", "2021-01-10"]),
+                "Country/Region": ["Kenya"] * 2,
+                "Confirmed": [0.5, np.nan],
+            }
+        ),
+        "Confirmed",
+    )
+    y = to_typed_arrays(fig)["data"][0]["y"]
+
+    assert y["dtype"] == "f8"
+    assert np.isnan(decode(y)[1])
@@ -0,0 +1,92 @@
+import os
+import pstats
+import subprocess
+import sys
+import time
+
+from flask import Flask
+
+from covid19_dash import profile_token as token_script
+from covid19_dash import server
+from covid19_dash.profiling import (
+    TOKEN_HEADER,
+    init_profiling,
+    profile_token,
+    valid_token,
+)
+
+
+def make_server() -> Flask:
+    app = Flask(__name__)
+
+    @app.post("/_dash-update-component")
+    def dispatch():
+        return str(sum(range(10_000)))
+
+    return app
+
+
+def test_disabled_by_default():
+    # Only admission control wraps Dash's view
+    view = server.view_functions["/_dash-update-component"].__wrapped__
+
+    assert view.__name__ == "dispatch"
+    assert not hasattr(view, "__wrapped__")
+
+
+def test_valid_token():
+    expires = int(time.time()) + 60
+    token = profile_token(expires, "secret")
+
+    assert valid_token(token, "secret")
+    assert not valid_token(token, "other secret")
+    assert not valid_token(profile_token(expires - 120, "secret"), "secret")
+    assert not valid_token(f"{expires + 60}.{token.split('.')[1]}", "secret")
+    assert not valid_token(None, "secret")
+    assert not valid_token(f"{expires}.é", "secret")
+    assert not valid_token("²", "secret")
+
+
+def test_token_script():
+    # Run by path, so that the dashboard is not loaded
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", token_script.__file__],
+        env={**os.environ, "PROFILE_SECRET": "secret"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert valid_token(output.stdout.strip(), "secret")
+    assert "covid19_dash" not in output.stderr
+    assert "flask" not in output.stderr
+
+
+def test_profile_with_token(tmp_path):
+    app = make_server()
+    init_profiling(app, secret="secret", directory=tmp_path)
+    client = app.test_client()
+    body = {"output": "line-plot.figure"}
+
+    # Only requests with a valid token are profiled
+    assert client.post("/_dash-update-component", json=body).status_code == 200
+    assert list(tmp_path.iterdir()) == []
+
+    token = profile_token(int(time.time()) + 60, "secret")
+    response = client.post(
+        "/_dash-update-component", json=body, headers={TOKEN_HEADER: token}
+    )
+    assert response.get_data(as_text=True) == str(sum(range(10_000)))
+    (profile,) = tmp_path.iterdir()
+    assert profile.name.endswith("-line-plot-figure.prof")
+    assert pstats.Stats(str(profile)).total_calls > 0
+
+
+def test_profile_every_request(tmp_path, caplog):
+    app = make_server()
+    init_profiling(app, always=True, secret=None, directory=tmp_path)
+
+    app.test_client().post("/_dash-update-component", json={"output": "x.y"})
+
+    assert len(list(tmp_path.iterdir())) == 1
+    assert "Slowest functions" in caplog.text
+    assert "dispatch" in caplog.text
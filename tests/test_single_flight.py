@@ -0,0 +1,97 @@
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from covid19_dash.data import LOADERS, loader_cache_info, single_flight
+
+
+def test_concurrent_callers_share_one_load():
+    calls = []
+
+    @single_flight(maxsize=2)
+    def slow_loader(day: date = date(2023, 4, 26)) -> list:
+        calls.append(day)
+        time.sleep(0.2)
+        return [day]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: slow_loader(), range(8)))
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    # Default and explicit arguments share a cache entry
+    assert slow_loader(date(2023, 4, 26)) is results[0]
+
+    info = slow_loader.cache_info()
+    assert info.loads == 1
+    assert info.hits + info.waits == 8
+
+
+def test_eviction():
+    @single_flight(maxsize=1)
+    def loader(key: int) -> object:
+        return object()
+
+    first = loader(1)
+    assert loader(1) is first
+    loader(2)
+    assert loader(1) is not first
+    assert loader.cache_info().currsize == 1
+
+
+def test_waiters_get_the_loader_error():
+    started = threading.Event()
+
+    @single_flight()
+    def failing_loader() -> None:
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("Download failed")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(failing_loader)
+        started.wait()
+        second = pool.submit(failing_loader)
+        for future in (first, second):
+            with pytest.raises(ValueError):
+                future.result()
+
+    # Failed loads are not cached
+    assert failing_loader.cache_info().currsize == 0
+
+
+def test_forked_child_does_not_wait_for_parent_loads():
+    parent = os.getpid()
+    started, release = threading.Event(), threading.Event()
+
+    @single_flight()
+    def loader() -> int:
+        started.set()
+        if os.getpid() == parent:
+            release.wait(5)
+        return os.getpid()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        loading = pool.submit(loader)
+        started.wait()
+        child = os.fork()
+        if child == 0:  # Load again, instead of waiting forever
+            signal.alarm(5)
+            os._exit(0 if loader() == os.getpid() else 1)
+        _, status = os.waitpid(child, 0)
+        release.set()
+        assert loading.result() == parent
+
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_loader_cache_info():
+    info = loader_cache_info()
+
+    assert "load_latest_day_data" in LOADERS
+    assert {"hits", "loads", "waits"} <= set(info.columns)
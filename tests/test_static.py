@@ -0,0 +1,47 @@
+from flask import Flask
+
+from covid19_dash import server, static
+from covid19_dash.static import (
+    IMMUTABLE,
+    asset_fingerprints,
+    asset_url,
+    stylesheet_links,
+)
+
+
+def test_fingerprinted_assets():
+    client = server.test_client()
+    url = asset_url("custom-style.css")
+
+    assert asset_fingerprints()["custom-style.css"] in url
+    assert url in client.get("/").get_data(as_text=True)
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == IMMUTABLE
+    # Stale fingerprints and unknown files are not served
+    stale_url = "/static-assets/000000000000/custom-style.css"
+    assert client.get(stale_url).status_code == 404
+    assert client.get(url.replace("custom-style", "style")).status_code == 404
+
+
+def test_no_external_scripts():
+    html = server.test_client().get("/raw-values").get_data(as_text=True)
+
+    assert "cdn.plot.ly" not in html
+
+
+def test_debug_fingerprints(monkeypatch, tmp_path):
+    monkeypatch.setattr(static, "ASSETS_DIR", tmp_path)
+    (tmp_path / "a.css").write_text("body {}")
+    (tmp_path / "b.css").write_text("p {}")
+    app = Flask(__name__)
+    app.debug = True
+
+    with app.app_context():
+        links = stylesheet_links()
+        assert asset_url("a.css") in links and asset_url("b.css") in links
+
+        # Edited assets get a new URL at once
+        (tmp_path / "a.css").write_text("body { margin: 0 }")
+        assert asset_url("a.css") not in links